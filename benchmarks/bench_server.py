@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+MCP server 基准测试
+
+用法:
+    python benchmarks/bench_server.py                         # 100 / 1k / 10k / 100k 个模块
+    python benchmarks/bench_server.py --sizes 100,1000 --iterations 50
+    python benchmarks/bench_server.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_server.py --compare benchmarks/baseline.json
+
+每个规模在独立子进程里运行（RSS 互不干扰）：生成合成 registry，
+用 SELF_IMPROVE_REPO_ROOT 指向它后导入 server，依次测
+冷启动、快照加载、search、find_entry、_handle_get_api、_handle_install，
+最后通过 ASGI client 并发请求 HTTP 路由、通过内存 MCP 会话并发调用工具。
+另外用 `python -X importtime` 反复测 registry_core.service（命令行路径）
+和 server（完整 Web 栈）的导入耗时，与规模无关，单独报告。
+报告 p50 / p99 延迟、吞吐和 RSS；--compare 时 p50 或 p99 超过基线
+(1 + threshold) 倍的项判为退化，退出码为 1。
+
+基线与机器相关，不提交到仓库，在同一台机器上先 --save-baseline 再 --compare。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from synth_registry import QUERIES, generate  # noqa: E402
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+# -X importtime 测量的模块：命令行只导入 registry_core，server 还要拉起 MCP / Web 栈
+IMPORT_TARGETS = ("registry_core.service", "server")
+# registry_core 不应导入的重依赖（NumPy 也应推迟到首次语义查询）
+HEAVY_MODULES = ("mcp", "starlette", "uvicorn", "jsonschema", "numpy", "sqlite3")
+# 参与基线比较的延迟指标
+COMPARED_KEYS = ("p50_ms", "p99_ms")
+
+
+def summarize(samples: list[float], wall: float | None = None) -> dict[str, float]:
+    """samples 为单次耗时（秒）；wall 为并发场景的总耗时，用于算吞吐"""
+    ordered = sorted(samples)
+    n = len(ordered)
+    total = wall if wall is not None else sum(ordered)
+    return {
+        "n": n,
+        "p50_ms": round(ordered[n // 2] * 1000, 4),
+        "p99_ms": round(ordered[min(n - 1, int(n * 0.99))] * 1000, 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "ops_per_s": round(n / total, 1) if total > 0 else 0.0,
+    }
+
+
+def timed(fn, args_list) -> list[float]:
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def rss_mb() -> float:
+    """当前 RSS（Linux 读 /proc，其他平台退回峰值）"""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位是 KB，macOS 是字节
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+# --- 子进程：单个规模 ---
+
+async def _bench_asgi(app, concurrency: int, requests: int) -> dict[str, float]:
+    import httpx
+
+    samples: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def session(worker: int) -> None:
+            for i in range(requests):
+                path = "/api/cache" if (worker + i) % 2 else "/metrics"
+                start = time.perf_counter()
+                response = await client.get(path)
+                samples.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(session(w) for w in range(concurrency)))
+        wall = time.perf_counter() - start
+    return summarize(samples, wall)
+
+
+async def _bench_mcp_http(server, names: list[str], concurrency: int, calls: int) -> dict[str, float]:
+    """无状态 /mcp 端点：每次工具调用一个 JSON-RPC POST"""
+    import httpx
+
+    headers = {"Accept": "application/json, text/event-stream"}
+    samples: list[float] = []
+    transport = httpx.ASGITransport(app=server.app)
+    # ASGITransport 不跑 lifespan，这里手动启动 session manager
+    async with server.http_session_manager.run(), httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        async def session(worker: int) -> None:
+            rng = random.Random(worker)
+            for i in range(calls):
+                if i % 2:
+                    tool, args = "search_modules", {"query": rng.choice(QUERIES)}
+                else:
+                    tool, args = "get_module_api", {"name": rng.choice(names)}
+                payload = {
+                    "jsonrpc": "2.0", "id": i, "method": "tools/call",
+                    "params": {"name": tool, "arguments": args},
+                }
+                start = time.perf_counter()
+                response = await client.post("/mcp", json=payload, headers=headers)
+                samples.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(session(w) for w in range(concurrency)))
+        wall = time.perf_counter() - start
+    return summarize(samples, wall)
+
+
+async def _bench_mcp(server, names: list[str], concurrency: int, calls: int) -> dict[str, float]:
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    samples: list[float] = []
+
+    async def session(worker: int) -> None:
+        rng = random.Random(worker)
+        async with create_connected_server_and_client_session(server.server) as client:
+            for i in range(calls):
+                if i % 2:
+                    tool, args = "search_modules", {"query": rng.choice(QUERIES)}
+                else:
+                    tool, args = "get_module_api", {"name": rng.choice(names)}
+                start = time.perf_counter()
+                await client.call_tool(tool, args)
+                samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(w) for w in range(concurrency)))
+    wall = time.perf_counter() - start
+    return summarize(samples, wall)
+
+
+def run_worker(root: Path, installable: list[str], iterations: int, concurrency: int) -> dict:
+    os.environ["SELF_IMPROVE_REPO_ROOT"] = str(root)
+    sys.path.insert(0, str(REPO_ROOT / "mcp-server"))
+    results: dict = {"rss_baseline_mb": rss_mb()}
+
+    start = time.perf_counter()
+    import server
+    from registry_core import service
+    from registry_core.registry_snapshot import build_snapshot, load_snapshot, write_snapshot
+    results["import_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    # 冷启动：解析 registry + 逐个读 manifest 建索引（无快照）
+    start = time.perf_counter()
+    entries = service.load_registry()
+    results["cold_start_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    results["modules"] = len(entries)
+    results["rss_loaded_mb"] = rss_mb()
+
+    # 预编译快照：生成耗时、大小、反序列化耗时
+    start = time.perf_counter()
+    snapshot = build_snapshot(root, service.REGISTRY_PATH)
+    results["snapshot_build_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    results["snapshot_bytes"] = write_snapshot(service.SNAPSHOT_PATH, snapshot)
+    del snapshot
+    registry_bytes = service.REGISTRY_PATH.read_bytes()
+    start = time.perf_counter()
+    load_snapshot(service.SNAPSHOT_PATH, registry_bytes)
+    results["snapshot_load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    rng = random.Random(0)
+    names = [entry["name"] for entry in entries]
+    queries = [(QUERIES[i % len(QUERIES)],) for i in range(iterations)]
+
+    def search_uncached(query: str) -> None:
+        service.search_cache.clear()
+        service.search(query)
+
+    results["search"] = summarize(timed(search_uncached, queries))
+    results["search_cached"] = summarize(timed(service.search, queries))
+    results["search_filtered"] = summarize(timed(
+        lambda q: service.search(q, filters={"type": "component", "lang": "python"}),
+        queries,
+    ))
+    results["find_entry"] = summarize(
+        timed(service.find_entry, [(rng.choice(names),) for _ in range(iterations * 10)])
+    )
+    results["get_api"] = summarize(
+        timed(server._handle_get_api, [(rng.choice(names),) for _ in range(iterations)])
+    )
+
+    # 安装：首次安装（写文件）和重复安装（全部跳过）
+    target = Path(tempfile.mkdtemp(prefix="bench-install-"))
+    try:
+        picks = [(installable[i % len(installable)], str(target / str(i))) for i in range(iterations)]
+        results["install"] = summarize(timed(server._handle_install, picks))
+        results["install_unchanged"] = summarize(timed(server._handle_install, picks))
+    finally:
+        shutil.rmtree(target, ignore_errors=True)
+
+    requests = max(1, iterations // concurrency)
+    results["asgi_http"] = asyncio.run(_bench_asgi(server.app, concurrency, requests))
+    results["mcp_sessions"] = asyncio.run(_bench_mcp(server, names, concurrency, requests))
+    results["mcp_http"] = asyncio.run(_bench_mcp_http(server, names, concurrency, requests))
+
+    service.install_journal.close()
+    results["rss_final_mb"] = rss_mb()
+    results["rss_peak_mb"] = peak_rss_mb()
+    return results
+
+
+# --- 导入耗时 ---
+
+def parse_importtime(stderr: str, target: str) -> tuple[float, dict[str, float], set[str]]:
+    """
+    解析 -X importtime 输出，返回 (target 的累计导入耗时 ms, {直接依赖: 累计 ms}, 全部模块名)。
+    target 与其父包各在顶层（缩进 0）占一行；子模块先于父模块输出，
+    所以顶层行之前的缩进 1 行就是它的直接依赖。
+    """
+    total_us = 0
+    children: dict[str, float] = {}
+    pending: dict[str, float] = {}
+    names: set[str] = set()
+    root = target.split(".")[0]
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, raw = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # 表头
+        name = raw.strip()
+        level = (len(raw) - len(raw.lstrip()) - 1) // 2
+        names.add(name)
+        if level == 1:
+            pending[name] = int(cumulative) / 1000
+        elif level == 0:
+            if name == root or name.startswith(root + "."):
+                total_us += int(cumulative)
+                children.update(pending)
+            pending = {}
+    return total_us / 1000, children, names
+
+
+def measure_imports(repeats: int) -> dict[str, dict]:
+    """每个目标在新进程里导入 repeats 次（先跑一次预热 .pyc），报告 p50 / p99"""
+    results = {}
+    for target in IMPORT_TARGETS:
+        samples = []
+        children: dict[str, float] = {}
+        names: set[str] = set()
+        for i in range(repeats + 1):
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                cwd=REPO_ROOT / "mcp-server", capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                raise RuntimeError(f"导入 {target} 失败:\n{proc.stderr[-2000:]}")
+            if i == 0:
+                continue
+            total_ms, children, names = parse_importtime(proc.stderr, target)
+            samples.append(total_ms / 1000)
+        summary = summarize(samples)
+        summary["heavy_modules"] = [name for name in HEAVY_MODULES if name in names]
+        summary["slowest"] = sorted(children.items(), key=lambda item: -item[1])[:5]
+        results[target] = summary
+    return results
+
+
+# --- 主进程 ---
+
+def run_size(size: int, iterations: int, concurrency: int, keep: bool) -> dict:
+    root = Path(tempfile.mkdtemp(prefix=f"bench-registry-{size}-"))
+    try:
+        start = time.perf_counter()
+        installable = generate(root, size)
+        generate_s = time.perf_counter() - start
+        proc = subprocess.run(
+            [
+                sys.executable, __file__, "--worker", str(root),
+                "--installable", ",".join(installable),
+                "--iterations", str(iterations), "--concurrency", str(concurrency),
+            ],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"规模 {size} 的基准失败:\n{proc.stderr}")
+        results = json.loads(proc.stdout.strip().splitlines()[-1])
+        results["generate_s"] = round(generate_s, 2)
+        return results
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def print_imports(imports: dict[str, dict]) -> None:
+    print("\n== 导入耗时（-X importtime）==")
+    print(f"{'模块':<24}{'n':>6}{'p50 ms':>12}{'p99 ms':>12}  重依赖")
+    for target, value in imports.items():
+        heavy = ", ".join(value["heavy_modules"]) or "-"
+        print(f"{target:<24}{value['n']:>6}{value['p50_ms']:>12.1f}{value['p99_ms']:>12.1f}  {heavy}")
+        slowest = ", ".join(f"{name} {ms:.1f}" for name, ms in value["slowest"])
+        print(f"{'':<24}最慢: {slowest}")
+
+
+def print_report(all_results: dict[str, dict]) -> None:
+    for size, results in all_results.items():
+        print(f"\n== {int(size):,} 个模块 ==")
+        print(
+            f"冷启动 {results['cold_start_ms']} ms | 快照加载 {results['snapshot_load_ms']} ms "
+            f"({results['snapshot_bytes'] / 2**20:.1f} MB) | "
+            f"RSS 加载后 {results['rss_loaded_mb']} MB, 峰值 {results['rss_peak_mb']} MB"
+        )
+        print(f"{'场景':<20}{'n':>8}{'p50 ms':>12}{'p99 ms':>12}{'ops/s':>12}")
+        for key, value in results.items():
+            if isinstance(value, dict):
+                print(
+                    f"{key:<20}{value['n']:>8}{value['p50_ms']:>12.3f}"
+                    f"{value['p99_ms']:>12.3f}{value['ops_per_s']:>12.1f}"
+                )
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for target, value in current.get("imports", {}).items():
+        base = baseline.get("imports", {}).get(target)
+        if base is None:
+            continue
+        for key in COMPARED_KEYS:
+            old, new = base[key], value[key]
+            if old > 0 and new > old * (1 + threshold):
+                regressions.append(
+                    f"导入 {target} {key}: {old} -> {new} (+{(new / old - 1):.0%})"
+                )
+    for size, results in current["results"].items():
+        base = baseline.get("results", {}).get(size)
+        if base is None:
+            continue
+        for bench, value in results.items():
+            if not isinstance(value, dict) or not isinstance(base.get(bench), dict):
+                continue
+            for key in COMPARED_KEYS:
+                old, new = base[bench][key], value[key]
+                if old > 0 and new > old * (1 + threshold):
+                    regressions.append(
+                        f"{size} 个模块 {bench} {key}: {old} -> {new} (+{(new / old - 1):.0%})"
+                    )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="MCP server 基准测试")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="逗号分隔的模块数，默认 100,1000,10000,100000")
+    parser.add_argument("--iterations", type=int, default=200, help="每个场景的调用次数")
+    parser.add_argument("--concurrency", type=int, default=8, help="ASGI / MCP 并发会话数")
+    parser.add_argument("--save-baseline", metavar="FILE", help="把结果保存为基线")
+    parser.add_argument("--compare", metavar="FILE", help="与基线比较，退化时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="允许的延迟增幅，默认 0.25（25%%）")
+    parser.add_argument("--import-repeats", type=int, default=10,
+                        help="-X importtime 每个模块的测量次数，0 表示跳过")
+    parser.add_argument("--keep", action="store_true", help="保留生成的合成 registry")
+    parser.add_argument("--worker", metavar="ROOT", help=argparse.SUPPRESS)
+    parser.add_argument("--installable", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        results = run_worker(
+            Path(args.worker), args.installable.split(","), args.iterations, args.concurrency
+        )
+        print(json.dumps(results))
+        return 0
+
+    all_results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"运行 {size:,} 个模块...", file=sys.stderr)
+        all_results[str(size)] = run_size(size, args.iterations, args.concurrency, args.keep)
+    print_report(all_results)
+    imports = measure_imports(args.import_repeats) if args.import_repeats > 0 else {}
+    if imports:
+        print_imports(imports)
+
+    document = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "imports": imports,
+        "results": all_results,
+    }
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+        print(f"\n基线已保存: {args.save_baseline}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(document, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 项退化（阈值 {args.threshold:.0%}）:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n✅ 与基线相比无退化（阈值 {args.threshold:.0%}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
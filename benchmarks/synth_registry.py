@@ -0,0 +1,111 @@
+"""
+生成合成 registry，用于基准测试
+
+在 root 下生成与本仓库相同布局的 registry.json 和 modules/<type>/<lang>/<name>/manifest.json。
+词汇按 Zipf 分布抽样，让常见词（fastapi、react、auth……）命中大量模块，
+长尾词只命中少数，接近真实 registry 的查询分布。
+只有前 src_modules 个 utility/component 模块带 src/，安装基准只用这些模块。
+"""
+
+import json
+import random
+from pathlib import Path
+
+COMMON_WORDS = [
+    "fastapi", "react", "auth", "jwt", "crud", "sqlmodel", "hook", "client", "http",
+    "cache", "retry", "email", "table", "theme", "config", "settings", "query", "form",
+    "upload", "router", "logger", "queue", "session", "token", "password", "pagination",
+    "websocket", "redis", "postgres", "docker", "validation", "schema", "middleware",
+]
+CJK_PHRASES = [
+    "数据库", "认证", "缓存", "重试", "分页", "表格", "主题", "配置", "日志", "上传",
+    "队列", "会话", "邮件", "校验", "中间件", "路由", "连接池", "限流",
+]
+MODULE_TYPES = ("utility", "component", "blueprint")
+TYPE_DIRS = {"utility": "utilities", "component": "components", "blueprint": "blueprints"}
+LANGS = ("python", "typescript")
+
+# 真实 registry 里的常用查询，基准按这个列表轮询
+QUERIES = [
+    "fastapi", "auth", "jwt", "crud", "react hook", "数据库", "http client retry",
+    "email", "pagination table", "缓存", "websocket session", "config settings",
+]
+
+
+def _vocabulary(rng: random.Random, size: int) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = list(COMMON_WORDS)
+    while len(words) < size:
+        words.append("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    return words
+
+
+def _zipf_sample(rng: random.Random, words: list[str], weights: list[float], k: int) -> list[str]:
+    return list(dict.fromkeys(rng.choices(words, weights=weights, k=k)))
+
+
+def _src_files(name: str, lang: str) -> dict[str, str]:
+    ext = "py" if lang == "python" else "ts"
+    body = f"# {name}\n" + "".join(f"def fn_{i}(x):\n    return x + {i}\n" for i in range(40))
+    return {
+        f"__init__.{ext}": f"# {name}\n",
+        f"core.{ext}": body,
+        f"helpers/util.{ext}": body[: len(body) // 2],
+    }
+
+
+def generate(root: Path, n: int, src_modules: int = 50, seed: int = 0) -> list[str]:
+    """生成 n 个模块，返回带 src/ 的模块名列表"""
+    rng = random.Random(seed)
+    words = _vocabulary(rng, max(200, n // 20))
+    weights = [1.0 / (rank + 1) for rank in range(len(words))]
+
+    modules = []
+    installable = []
+    for i in range(n):
+        type_ = MODULE_TYPES[0 if i % 10 < 6 else 1 if i % 10 < 9 else 2]
+        lang = "shared" if type_ == "blueprint" else LANGS[i % 2]
+        tags = _zipf_sample(rng, words, weights, 5)
+        name = f"{tags[0]}-{rng.choice(words)}-{i}"
+        phrase = rng.choice(CJK_PHRASES)
+        summary = f"{phrase}工具：" + " ".join(_zipf_sample(rng, words, weights, 8))
+        path = f"modules/{TYPE_DIRS[type_]}/{lang}/{name}"
+
+        manifest = {
+            "name": name,
+            "type": type_,
+            "lang": lang,
+            "summary": summary,
+            "tags": tags,
+        }
+        if type_ != "blueprint":
+            manifest["api"] = {
+                f"{w}_{j}(arg) -> None": f"{phrase} " + " ".join(_zipf_sample(rng, words, weights, 4))
+                for j, w in enumerate(_zipf_sample(rng, words, weights, 3))
+            }
+            manifest["install"] = {"dependencies": [f"{tags[-1]}>=1.0"], "entry": name}
+        else:
+            manifest["design_decisions"] = [f"使用 {w}" for w in tags]
+
+        module_dir = root / path
+        module_dir.mkdir(parents=True, exist_ok=True)
+        (module_dir / "manifest.json").write_text(
+            json.dumps(manifest, ensure_ascii=False), encoding="utf-8"
+        )
+        if type_ != "blueprint" and len(installable) < src_modules:
+            for rel, content in _src_files(name, lang).items():
+                file = module_dir / "src" / rel
+                file.parent.mkdir(parents=True, exist_ok=True)
+                file.write_text(content, encoding="utf-8")
+            installable.append(name)
+
+        modules.append({
+            "name": name, "type": type_, "lang": lang,
+            "summary": summary, "tags": tags, "path": path,
+        })
+
+    (root / "registry.json").write_text(
+        json.dumps({"version": "1.0", "modules": modules}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    return installable
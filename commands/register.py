@@ -2,15 +2,35 @@
 """
 注册模块到 registry.json
 
-用法: python commands/register.py modules/utilities/python/http-client
+用法:
+    python commands/register.py modules/utilities/python/http-client
+    python commands/register.py <module_path> [<module_path> ...]
+    python commands/register.py --scan modules/ [--prune]
+
+批量/扫描模式下并行读取和校验 manifest，按模块名合并后只写一次 registry
+（临时文件 + rename）。注册后重新生成 MCP server 启动用的预编译快照。
 """
 
+import argparse
 import json
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).parent.parent
 REGISTRY_PATH = REPO_ROOT / "registry.json"
+ARCHIVES_PATH = REPO_ROOT / ".module-store" / "archives"
+SNAPSHOT_PATH = REPO_ROOT / ".module-store" / "registry.snapshot"
+
+# 归档、快照逻辑与 MCP server 共用
+sys.path.insert(0, str(REPO_ROOT / "mcp-server"))
+from registry_core.module_archive import ArchiveStore  # noqa: E402
+from registry_core.registry_snapshot import build_snapshot, write_snapshot  # noqa: E402
+
+MODULE_TYPES = ("utility", "component", "blueprint")
+MODULE_LANGS = ("python", "typescript", "shared")
+REQUIRED_FIELDS = ("name", "type", "lang", "summary")
 
 
 def load_registry() -> dict:
@@ -20,22 +40,41 @@ def load_registry() -> dict:
 
 
 def save_registry(data: dict) -> None:
-    REGISTRY_PATH.write_text(
+    """写临时文件后 rename，server 的后台重载不会读到半个文件"""
+    tmp = REGISTRY_PATH.with_name(f".{REGISTRY_PATH.name}.{os.getpid()}.tmp")
+    tmp.write_text(
         json.dumps(data, ensure_ascii=False, indent=2) + "\n",
         encoding="utf-8",
     )
-
-
-def register(module_path: str) -> None:
-    """从模块目录读取 manifest.json，注册到 registry"""
-    module_dir = REPO_ROOT / module_path
-    manifest_path = module_dir / "manifest.json"
-
+    os.replace(tmp, REGISTRY_PATH)
+
+
+def validate_manifest(manifest: dict) -> list[str]:
+    """返回 manifest 的问题列表，空列表表示合法"""
+    errors = [f"缺少字段 {key}" for key in REQUIRED_FIELDS if not manifest.get(key)]
+    if manifest.get("type") and manifest["type"] not in MODULE_TYPES:
+        errors.append(f"type 必须是 {' | '.join(MODULE_TYPES)}")
+    if manifest.get("lang") and manifest["lang"] not in MODULE_LANGS:
+        errors.append(f"lang 必须是 {' | '.join(MODULE_LANGS)}")
+    if not isinstance(manifest.get("tags", []), list):
+        errors.append("tags 必须是数组")
+    if manifest.get("type") in ("utility", "component") and not manifest.get("api"):
+        errors.append("utility/component 必须包含 api")
+    return errors
+
+
+def load_entry(module_path: str) -> tuple[dict | None, list[str]]:
+    """读取并校验 <module_path>/manifest.json，返回 (registry 条目, 错误列表)"""
+    manifest_path = REPO_ROOT / module_path / "manifest.json"
     if not manifest_path.exists():
-        print(f"错误: {manifest_path} 不存在")
-        sys.exit(1)
+        return None, [f"{manifest_path} 不存在"]
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except ValueError as exc:
+        return None, [f"{manifest_path} 不是合法 JSON: {exc}"]
 
-    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if errors := validate_manifest(manifest):
+        return None, errors
 
     # 构建 registry 条目（只保留索引需要的字段）
     entry = {
@@ -46,22 +85,122 @@ def register(module_path: str) -> None:
         "tags": manifest.get("tags", []),
         "path": module_path,
     }
+    return entry, []
 
-    registry = load_registry()
-    modules = registry["modules"]
 
-    # 去重：同名模块覆盖
-    modules = [m for m in modules if m["name"] != entry["name"]]
-    modules.append(entry)
-    registry["modules"] = modules
+def scan_modules(root: str) -> list[str]:
+    """找出 root 下所有含 manifest.json 的模块目录（相对 REPO_ROOT）"""
+    root_dir = (REPO_ROOT / root).resolve()
+    return sorted(
+        manifest.parent.relative_to(REPO_ROOT.resolve()).as_posix()
+        for manifest in root_dir.rglob("manifest.json")
+        # 跳过 src/ 里碰巧叫 manifest.json 的文件
+        if "src" not in manifest.relative_to(root_dir).parts
+    )
+
+
+def scan_root_relative(root: str) -> str:
+    return (REPO_ROOT / root).resolve().relative_to(REPO_ROOT.resolve()).as_posix()
+
 
+def register_many(module_paths: list[str], prune_under: str | None = None) -> bool:
+    """注册多个模块，registry 只读写一次；返回是否全部成功"""
+    with ThreadPoolExecutor() as pool:
+        loaded = list(pool.map(load_entry, module_paths))
+
+    ok = True
+    entries: dict[str, dict] = {}
+    for module_path, (entry, errors) in zip(module_paths, loaded):
+        if errors:
+            ok = False
+            for error in errors:
+                print(f"❌ {module_path}: {error}")
+            continue
+        if (other := entries.get(entry["name"])) is not None:
+            ok = False
+            print(f"❌ {module_path}: 模块名 {entry['name']} 与 {other['path']} 重复")
+            continue
+        entries[entry["name"]] = entry
+
+    # 按模块名合并：已有模块原位覆盖，新模块追加到末尾
+    registry = load_registry()
+    merged = {m["name"]: m for m in registry["modules"]}
+    pruned = False
+    if prune_under is not None:
+        prefix = prune_under.rstrip("/") + "/"
+        registered_paths = {entry["path"] for entry in entries.values()}
+        for name, m in list(merged.items()):
+            if not m["path"].startswith(prefix) or name in entries:
+                continue
+            # 只移除 manifest.json 已删除、或同一目录已换名注册的模块；
+            # 校验失败的模块保留原条目
+            manifest_path = REPO_ROOT / m["path"] / "manifest.json"
+            if m["path"] in registered_paths or not manifest_path.exists():
+                del merged[name]
+                pruned = True
+                print(f"🗑️  已移除不存在的模块: {name}")
+    if not entries and not pruned:
+        # 没有可注册或可移除的模块：registry 和快照都保持原样
+        return ok
+    merged.update(entries)
+    registry["modules"] = list(merged.values())
     save_registry(registry)
-    print(f"✅ 已注册模块: {entry['name']} ({entry['type']}/{entry['lang']})")
 
+    for entry in entries.values():
+        print(f"✅ 已注册模块: {entry['name']} ({entry['type']}/{entry['lang']})")
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("用法: python commands/register.py <module_path>")
-        print("示例: python commands/register.py modules/utilities/python/http-client")
+    with ThreadPoolExecutor() as pool:
+        list(pool.map(build_archive, entries.values()))
+
+    size = write_snapshot(SNAPSHOT_PATH, build_snapshot(REPO_ROOT, REGISTRY_PATH))
+    print(f"📦 已生成预编译快照: {SNAPSHOT_PATH.relative_to(REPO_ROOT)} ({size} 字节)")
+    return ok
+
+
+def register(module_path: str) -> None:
+    """从模块目录读取 manifest.json，注册到 registry"""
+    if not register_many([module_path]):
         sys.exit(1)
-    register(sys.argv[1])
+
+
+def build_archive(entry: dict) -> None:
+    """为可安装模块预打包 src/，install 时直接流式解压"""
+    src_dir = REPO_ROOT / entry["path"] / "src"
+    if entry["type"] == "blueprint" or not src_dir.is_dir():
+        return
+    meta = ArchiveStore(ARCHIVES_PATH).build(entry["name"], src_dir)
+    print(
+        f"   {entry['name']} 归档: {len(meta['files'])} 个文件, "
+        f"{meta['size']} 字节, sha256 {meta['sha256'][:12]}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="注册模块到 registry.json")
+    parser.add_argument("module_paths", nargs="*", help="模块目录（相对仓库根目录）")
+    parser.add_argument("--scan", metavar="DIR", help="扫描 DIR 下所有 manifest.json 并注册")
+    parser.add_argument(
+        "--prune", action="store_true",
+        help="配合 --scan：从 registry 移除 DIR 下已不存在的模块",
+    )
+    args = parser.parse_args(argv)
+
+    if args.prune and not args.scan:
+        parser.error("--prune 只能和 --scan 一起使用")
+
+    module_paths = [p.rstrip("/") for p in args.module_paths]
+    if args.scan:
+        scanned = scan_modules(args.scan)
+        print(f"扫描到 {len(scanned)} 个模块")
+        module_paths.extend(p for p in scanned if p not in module_paths)
+    if not module_paths:
+        parser.print_usage()
+        print("示例: python commands/register.py modules/utilities/python/http-client")
+        return 1
+
+    prune_under = scan_root_relative(args.scan) if args.prune else None
+    return 0 if register_many(module_paths, prune_under) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""
+模块 registry 的核心逻辑：索引、搜索、manifest 缓存、安装与统计
+
+不依赖 MCP、Starlette、uvicorn，可以单独导入或用命令行调用：
+
+    cd mcp-server && python -m registry_core search jwt
+
+- service: registry / 搜索 / 安装的共享状态和入口函数（server.py 与命令行共用）
+- 其余子模块是各自独立的组件，按需导入
+"""
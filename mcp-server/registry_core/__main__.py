@@ -0,0 +1,135 @@
+"""
+命令行：不启动 MCP server，直接检索和安装模块
+
+用法（在 mcp-server/ 下）:
+    python -m registry_core search jwt [--mode hybrid] [--type utility] [--lang python] [--tag auth]
+    python -m registry_core api http-client [fastapi-jwt-auth ...]
+    python -m registry_core install http-client --target ./lib [--mode hardlink] [--record]
+    python -m registry_core stats [--window 24h]
+
+只导入 registry_core，不加载 mcp / Starlette / uvicorn；有预编译快照时直接加载快照。
+"""
+
+import argparse
+import json
+import sys
+
+from . import service
+from .content_store import INSTALL_MODES
+from .search_index import FACETS
+
+
+def _load() -> None:
+    # 快照缺失或过期时，第一次访问 registry 会解析 registry.json 并建索引
+    service.load_registry_snapshot()
+
+
+def cmd_search(args: argparse.Namespace) -> int:
+    filters = {"type": args.type, "lang": args.lang, "tags": args.tag}
+    total, results = service.search(
+        args.query, limit=args.limit, mode=args.mode,
+        filters={facet: filters[facet] for facet in FACETS}, offset=args.offset,
+    )
+    if args.json:
+        payload = {"total": total, "offset": args.offset, "results": results}
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
+        return 0
+    if not total:
+        print("未找到匹配的模块", file=sys.stderr)
+        return 1
+    width = max(len(r["name"]) for r in results) if results else 0
+    for r in results:
+        print(f"{r['name']:<{width}}  {r['type']:<9}  {r['lang']:<10}  {r['summary']}")
+    shown = args.offset + len(results)
+    print(f"\n{args.offset + 1 if results else 0}-{shown} / {total}", file=sys.stderr)
+    return 0
+
+
+def cmd_api(args: argparse.Namespace) -> int:
+    missing = [name for name in args.names if service.find_entry(name) is None]
+    docs = [service.api_doc_or_error(name) for name in dict.fromkeys(args.names)]
+    print("\n\n---\n\n".join(docs))
+    return 1 if missing else 0
+
+
+def cmd_install(args: argparse.Namespace) -> int:
+    installed: list[service.InstallResult] = []
+    failed = 0
+    for name in dict.fromkeys(args.names):
+        try:
+            result = service.install_one(name, args.target, args.mode)
+        except service.InstallError as exc:
+            print(f"❌ {name}: {exc}", file=sys.stderr)
+            failed += 1
+            continue
+        installed.append(result)
+        print(service.format_install(result))
+    if len(installed) > 1 and (deps := service.merge_dependencies(installed)):
+        print(f"\n合并后的依赖: {', '.join(deps)}")
+    if args.record:
+        service.record_installs([r.module for r in installed], args.target)
+    return 1 if failed else 0
+
+
+def cmd_stats(args: argparse.Namespace) -> int:
+    window_kwargs = service.parse_window(args.window) if args.window else None
+    if args.window and window_kwargs is None:
+        print(service.WINDOW_FORMAT_ERROR, file=sys.stderr)
+        return 2
+
+    total, counts = service.install_stats.totals()
+    if window_kwargs:
+        counts = service.install_stats.window(**window_kwargs)
+        total = sum(counts.values())
+    for name, n in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+        if n:
+            print(f"{n:>8}  {name}")
+    print(f"\n共 {total} 次安装" + (f"（最近 {args.window}）" if args.window else ""), file=sys.stderr)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m registry_core", description="检索、查看、安装 registry 中的模块"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("search", help="搜索模块")
+    p.add_argument("query", help="搜索关键词；空字符串列出全部")
+    p.add_argument("--mode", choices=service.SEARCH_MODES, default="keyword")
+    p.add_argument("--type", choices=("utility", "component", "blueprint"))
+    p.add_argument("--lang", choices=("python", "typescript", "shared"))
+    p.add_argument("--tag", action="append", help="必须包含的标签，可重复")
+    p.add_argument("--limit", type=int, default=service.SEARCH_TOP_K)
+    p.add_argument("--offset", type=int, default=0)
+    p.add_argument("--json", action="store_true", help="输出 JSON（与 search_modules 结构相同）")
+    p.set_defaults(handler=cmd_search)
+
+    p = commands.add_parser("api", help="查看模块 API 文档")
+    p.add_argument("names", nargs="+", metavar="name")
+    p.set_defaults(handler=cmd_api)
+
+    p = commands.add_parser("install", help="安装模块到目标目录")
+    p.add_argument("names", nargs="+", metavar="name")
+    p.add_argument("--target", required=True, help="安装目标路径（如 ./lib）")
+    p.add_argument("--mode", choices=INSTALL_MODES, default="copy")
+    p.add_argument(
+        "--record", action="store_true",
+        help="计入安装统计；server 同时在运行时请用 sqlite 统计后端",
+    )
+    p.set_defaults(handler=cmd_install)
+
+    p = commands.add_parser("stats", help="按模块汇总安装次数")
+    p.add_argument("--window", help="只统计最近一段时间，如 24h、7d")
+    p.set_defaults(handler=cmd_stats)
+
+    args = parser.parse_args(argv)
+    if args.command == "search" and (args.limit < 1 or args.offset < 0):
+        parser.error("--limit 至少为 1，--offset 不能为负")
+    if args.command != "stats":
+        _load()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
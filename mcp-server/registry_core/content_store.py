@@ -0,0 +1,215 @@
+"""
+按内容寻址的安装
+
+- content_manifest(src_dir): 模块源码的 {相对路径: FileInfo(sha256, size)}，
+  按文件 (mtime_ns, size) 缓存哈希，源码不变时不重复读文件
+- ContentStore: 本地对象库 objects/<sha[:2]>/<sha>，对象只读
+- install_tree(): 目标文件内容相同则跳过；否则 hardlink（可选）或
+  reflink / copy_file_range / 普通复制，先写临时文件再 rename
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import stat
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .lru_cache import LRUCache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Linux FICLONE ioctl：在 btrfs/xfs 等文件系统上共享数据块
+FICLONE = 0x40049409
+
+INSTALL_MODES = ("copy", "hardlink")
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    sha256: str
+    size: int
+
+
+@dataclass
+class InstallReport:
+    added: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    bytes_written: int = 0
+
+
+def file_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+# 哈希缓存的条目数：源码、内容库对象和安装目标文件都会进来，长期运行的 server 需要设上限
+DIGEST_CACHE_SIZE = 8192
+# 路径 -> ((mtime_ns, size), sha256)
+_digest_cache = LRUCache(DIGEST_CACHE_SIZE)
+
+
+def cached_digest(path: Path, st: os.stat_result) -> str:
+    signature = (st.st_mtime_ns, st.st_size)
+    cached = _digest_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    digest = file_digest(path)
+    _digest_cache.put(path, (signature, digest))
+    return digest
+
+
+def content_manifest(src_dir: Path) -> dict[str, FileInfo]:
+    """模块源码目录 -> {posix 相对路径: FileInfo}，按路径排序"""
+    files: dict[str, FileInfo] = {}
+    for path in sorted(src_dir.rglob("*")):
+        if not path.is_file():
+            continue
+        rel_path = path.relative_to(src_dir)
+        # 本地运行源码留下的字节码不属于模块内容
+        if "__pycache__" in rel_path.parts:
+            continue
+        st = path.stat()
+        rel = rel_path.as_posix()
+        files[rel] = FileInfo(cached_digest(path, st), st.st_size)
+    return files
+
+
+def temp_path(path: Path) -> Path:
+    """path 同目录下的临时文件名：带 pid 和线程 id，并发写同一目标时互不覆盖"""
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+class ContentStore:
+    """本地内容库，hardlink 模式下作为链接源"""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / sha256
+
+    def ensure(self, src: Path, info: FileInfo) -> Path:
+        """
+        把 src 放进内容库，返回对象路径。
+
+        已有对象先校验大小和哈希（按 mtime 缓存）：hardlink 安装的文件被原地编辑
+        （如 vim 的 :w!）时改的是对象本身，损坏的对象换成新文件，不再链接给后续安装。
+        """
+        obj = self.object_path(info.sha256)
+        try:
+            st = obj.stat()
+        except FileNotFoundError:
+            st = None
+        if st is not None and st.st_size == info.size and cached_digest(obj, st) == info.sha256:
+            return obj
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        tmp = temp_path(obj)
+        clone_file(src, tmp)
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, obj)
+        return obj
+
+
+def clone_file(src: Path, dst: Path) -> None:
+    """尽量零拷贝地复制文件内容：FICLONE -> copy_file_range -> 用户态复制"""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return
+            except OSError:
+                pass
+        if hasattr(os, "copy_file_range"):
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+                if remaining == 0:
+                    return
+            except OSError as exc:
+                if exc.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                    raise
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+        shutil.copyfileobj(fsrc, fdst)
+
+
+def same_content(dst: Path, info: FileInfo, obj: Path | None = None, private: bool = False) -> bool:
+    """
+    dst 的内容是否已与 info 一致（可跳过）。
+    private=True（copy 模式）时，仍与内容库对象或其他安装共享 inode、或只读的文件
+    （之前 hardlink 安装的结果）视为不同：要换成可编辑的独立副本。
+    """
+    try:
+        st = dst.stat()
+    except FileNotFoundError:
+        return False
+    if st.st_size != info.size:
+        return False
+    if private and (st.st_nlink > 1 or not st.st_mode & stat.S_IWUSR):
+        return False
+    # 已经硬链接到同一个对象：按 mtime 缓存的哈希校验，对象未被原地修改时不用再读内容
+    if obj is not None and obj.exists() and os.path.samestat(st, obj.stat()):
+        return cached_digest(dst, st) == info.sha256
+    return file_digest(dst) == info.sha256
+
+
+def install_tree(
+    src_dir: Path,
+    dest: Path,
+    files: dict[str, FileInfo],
+    store: ContentStore | None = None,
+    mode: str = "copy",
+) -> InstallReport:
+    """把 files 描述的源码安装到 dest，返回新增/更新/跳过的文件"""
+    if mode not in INSTALL_MODES:
+        raise ValueError(f"未知安装模式: {mode}")
+
+    report = InstallReport()
+    for rel, info in files.items():
+        src_file = src_dir / rel
+        dst_file = dest / rel
+        obj = store.object_path(info.sha256) if store and mode == "hardlink" else None
+
+        existed = dst_file.exists()
+        if existed and same_content(dst_file, info, obj, private=mode == "copy"):
+            report.skipped.append(rel)
+            continue
+
+        dst_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = temp_path(dst_file)
+        linked = False
+        try:
+            if store and mode == "hardlink":
+                obj = store.ensure(src_file, info)
+                try:
+                    os.link(obj, tmp)
+                    linked = True
+                except OSError:
+                    # 跨文件系统或不支持硬链接，退回复制
+                    linked = False
+            if not linked:
+                clone_file(src_file, tmp)
+                shutil.copystat(src_file, tmp)
+                report.bytes_written += info.size
+            os.replace(tmp, dst_file)
+            if linked:
+                # 并发安装已把 dst_file 链接到同一对象时 rename 什么也不做，临时链接留在原处
+                tmp.unlink(missing_ok=True)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+        (report.changed if existed else report.added).append(rel)
+    return report
@@ -0,0 +1,326 @@
+"""
+安装记录：追加写 JSONL 日志 + 周期性压实为按模块聚合的 stats.json
+
+- append(): 只入队，由唯一的写线程批量追加到日志，每批 fsync 一次
+- 日志每条记录带递增 seq；压实时把 seq > last_seq 的记录折叠进聚合文件，
+  原子替换聚合文件后再清空日志。两步之间崩溃也不会重复计数
+- 首次启动时把旧版 stats.json（{"installs": [...]}）迁移为聚合格式
+- InstallStats 在内存里维护同样的聚合（含按小时/按天分桶计数），
+  安装时同步累加，/api/stats 直接读内存，压实即快照落盘
+"""
+
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+STATS_VERSION = 2
+
+# 分桶保留时长：小时桶 7 天，天桶 90 天
+HOURLY_RETENTION = timedelta(days=7)
+DAILY_RETENTION = timedelta(days=90)
+
+
+def empty_aggregates() -> dict[str, Any]:
+    return {
+        "version": STATS_VERSION,
+        "last_seq": 0,
+        "total_installs": 0,
+        "modules": {},
+        "hourly": {},
+        "daily": {},
+    }
+
+
+def _bump_bucket(
+    buckets: dict[str, dict[str, int]], key: str, module: str, retention: timedelta, fmt: str
+) -> None:
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = {}
+        # 新桶出现时顺带清理过期桶（key 是 ISO 前缀，可直接按字符串比较）
+        cutoff = (datetime.now(timezone.utc) - retention).strftime(fmt)
+        for stale in [k for k in buckets if k < cutoff]:
+            del buckets[stale]
+    bucket[module] = bucket.get(module, 0) + 1
+
+
+def fold_record(aggregates: dict[str, Any], record: dict[str, Any]) -> None:
+    """把一条安装记录累加到聚合数据"""
+    module = aggregates["modules"].setdefault(
+        record["module"], {"installs": 0, "last_install": None, "last_target_dir": None}
+    )
+    module["installs"] += 1
+    if not module["last_install"] or record["timestamp"] >= module["last_install"]:
+        module["last_install"] = record["timestamp"]
+        module["last_target_dir"] = record.get("target_dir")
+    aggregates["total_installs"] += 1
+    aggregates["last_seq"] = max(aggregates["last_seq"], record.get("seq", 0))
+
+    timestamp = record["timestamp"]
+    _bump_bucket(aggregates.setdefault("hourly", {}), timestamp[:13], record["module"],
+                 HOURLY_RETENTION, "%Y-%m-%dT%H")
+    _bump_bucket(aggregates.setdefault("daily", {}), timestamp[:10], record["module"],
+                 DAILY_RETENTION, "%Y-%m-%d")
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """写临时文件后 rename，读者不会看到写了一半的文件"""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, ensure_ascii=False, indent=2) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class InstallJournal:
+    """
+    单写者安装日志。
+
+    - append(record) / append_many(records): 入队记录（module / target_dir / timestamp）
+    - flush(): 阻塞到已入队记录全部落盘
+    - compact(): 立即压实日志
+    - load_aggregates(): 聚合文件 + 未压实日志的合并视图
+    """
+
+    def __init__(
+        self,
+        journal_path: Path,
+        stats_path: Path,
+        batch_size: int = 64,
+        flush_interval: float = 0.2,
+        compact_every: int = 1000,
+    ) -> None:
+        self.journal_path = journal_path
+        self.stats_path = stats_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self._queue: queue.Queue = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._next_seq = 1
+        self._pending_compact = 0
+
+    # --- 读 ---
+
+    def load_aggregates(self) -> dict[str, Any]:
+        self._ensure_started()
+        aggregates = self._read_aggregates()
+        for record in self._read_journal():
+            if record.get("seq", 0) > aggregates["last_seq"]:
+                fold_record(aggregates, record)
+        return aggregates
+
+    def _read_aggregates(self) -> dict[str, Any]:
+        if not self.stats_path.exists():
+            return empty_aggregates()
+        data = json.loads(self.stats_path.read_text(encoding="utf-8"))
+        if data.get("version") != STATS_VERSION:
+            return self._migrate_legacy(data)
+        return data
+
+    def _read_journal(self) -> list[dict[str, Any]]:
+        if not self.journal_path.exists():
+            return []
+        records = []
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # 崩溃时可能留下半行，跳过
+                    continue
+        return records
+
+    def _migrate_legacy(self, legacy: dict[str, Any]) -> dict[str, Any]:
+        """旧版 stats.json 逐条记录 -> 聚合格式，原文件备份为 stats.json.bak"""
+        aggregates = empty_aggregates()
+        for record in legacy.get("installs", []):
+            fold_record(aggregates, record)
+        backup = self.stats_path.with_name(self.stats_path.name + ".bak")
+        if not backup.exists():
+            os.replace(self.stats_path, backup)
+        write_json_atomic(self.stats_path, aggregates)
+        return aggregates
+
+    # --- 写 ---
+
+    def append(self, record: dict[str, Any]) -> None:
+        self.append_many([record])
+
+    def append_many(self, records: list[dict[str, Any]]) -> None:
+        """同一批记录作为一个队列项，保证写在同一次 write + fsync 里"""
+        self._ensure_started()
+        self._queue.put(records)
+
+    def flush(self) -> None:
+        if self._thread is None:
+            return
+        self._request("flush")
+
+    def compact(self) -> None:
+        self._ensure_started()
+        self._request("compact")
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _request(self, kind: str) -> None:
+        done = threading.Event()
+        self._queue.put((kind, done))
+        done.wait()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            aggregates = self._read_aggregates()
+            journal = self._read_journal()
+            last_seq = max([aggregates["last_seq"], *(r.get("seq", 0) for r in journal)])
+            self._next_seq = last_seq + 1
+            self._pending_compact = len(journal)
+            self._thread = threading.Thread(
+                target=self._run, name="install-journal", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: list[dict[str, Any]] = []
+            waiters: list[threading.Event] = []
+            compact = False
+
+            # 攒一批：第一条到达后最多再等 flush_interval
+            item = self._queue.get()
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, tuple):
+                    kind, done = item
+                    compact = compact or kind == "compact"
+                    waiters.append(done)
+                else:
+                    batch.extend(item)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+
+            try:
+                if batch:
+                    self._write_batch(batch)
+                if compact or self._pending_compact >= self.compact_every:
+                    self._compact()
+            except Exception as exc:  # 写线程不能退出，否则后续记录全部丢失
+                print(f"安装日志写入失败: {exc}", file=sys.stderr)
+            finally:
+                for done in waiters:
+                    done.set()
+
+    def _write_batch(self, batch: list[dict[str, Any]]) -> None:
+        lines = []
+        for record in batch:
+            record = {"seq": self._next_seq, **record}
+            self._next_seq += 1
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending_compact += len(batch)
+
+    def _compact(self) -> None:
+        aggregates = self.load_aggregates()
+        write_json_atomic(self.stats_path, aggregates)
+        # 聚合文件已包含日志里的全部 seq，清空日志
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._pending_compact = 0
+
+
+class InstallStats:
+    """
+    内存中的安装计数器，启动时从聚合文件 + 日志恢复一次。
+
+    - record(module, target_dir): 写日志并同步累加内存计数
+    - totals(): (总安装数, {模块: 安装数})
+    - window(hours=, days=): 时间窗口内各模块安装数（按小时桶或天桶求和）
+    - version: 每次累加 +1，便于上层缓存响应
+    """
+
+    def __init__(self, journal: InstallJournal) -> None:
+        self.journal = journal
+        self.version = 0
+        self._aggregates: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+
+    def _loaded(self) -> dict[str, Any]:
+        if self._aggregates is None:
+            with self._lock:
+                if self._aggregates is None:
+                    self._aggregates = self.journal.load_aggregates()
+        return self._aggregates
+
+    def record(self, module: str, target_dir: str) -> None:
+        self.record_many([module], target_dir)
+
+    def record_many(self, modules: list[str], target_dir: str) -> None:
+        timestamp = datetime.now(timezone.utc).isoformat()
+        records = [
+            {"module": module, "target_dir": target_dir, "timestamp": timestamp}
+            for module in modules
+        ]
+        aggregates = self._loaded()
+        self.journal.append_many(records)
+        with self._lock:
+            for record in records:
+                fold_record(aggregates, record)
+            self.version += 1
+
+    def totals(self) -> tuple[int, dict[str, int]]:
+        aggregates = self._loaded()
+        with self._lock:
+            counts = {name: m["installs"] for name, m in aggregates["modules"].items()}
+            return aggregates["total_installs"], counts
+
+    def window(self, hours: int | None = None, days: int | None = None) -> dict[str, int]:
+        """最近 hours 小时（或 days 天，含今天）的安装数"""
+        now = datetime.now(timezone.utc)
+        if hours is not None:
+            key, since = "hourly", (now - timedelta(hours=hours - 1)).strftime("%Y-%m-%dT%H")
+        elif days is not None:
+            key, since = "daily", (now - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        else:
+            return self.totals()[1]
+
+        aggregates = self._loaded()
+        counts: dict[str, int] = {}
+        with self._lock:
+            for bucket_key, bucket in aggregates.get(key, {}).items():
+                if bucket_key < since:
+                    continue
+                for module, n in bucket.items():
+                    counts[module] = counts.get(module, 0) + n
+        return counts
+
+    def snapshot(self) -> dict[str, Any]:
+        aggregates = self._loaded()
+        with self._lock:
+            return json.loads(json.dumps(aggregates))
@@ -0,0 +1,214 @@
+"""
+多进程共享的安装统计（SQLite WAL）
+
+多 worker 部署时每个进程各有一份内存计数器，互相看不到对方的安装。
+SQLiteInstallStats 与 InstallStats 接口相同，但计数直接累加在 SQLite 里：
+WAL 模式下读写互不阻塞，每次安装一个短事务（UPSERT 模块计数 + 小时/天桶），
+/api/stats 在任意 worker 上读到的都是全部 worker 的合计。
+
+首次创建数据库时导入已有的 stats.json + installs.jsonl，计数不会清零。
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from .install_log import (
+    DAILY_RETENTION,
+    HOURLY_RETENTION,
+    STATS_VERSION,
+    InstallJournal,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS modules (
+    name TEXT PRIMARY KEY,
+    installs INTEGER NOT NULL,
+    last_install TEXT,
+    last_target_dir TEXT
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    module TEXT NOT NULL,
+    installs INTEGER NOT NULL,
+    PRIMARY KEY (granularity, bucket, module)
+) WITHOUT ROWID;
+"""
+
+# (桶粒度, 时间戳前缀长度, 保留时长, strftime 格式)
+GRANULARITIES = (
+    ("hourly", 13, HOURLY_RETENTION, "%Y-%m-%dT%H"),
+    ("daily", 10, DAILY_RETENTION, "%Y-%m-%d"),
+)
+
+
+class SQLiteInstallStats:
+    """
+    - record(module, target_dir) / record_many(modules, target_dir): 一个事务累加
+    - totals() / window(hours=, days=) / snapshot(): 与 InstallStats 相同
+    - version: 所有进程共享的写入计数，用于上层缓存响应
+    """
+
+    def __init__(self, db_path: Path, legacy: InstallJournal | None = None) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._legacy = legacy
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL 下 NORMAL 只在断电时可能丢最后几个事务，不会损坏数据库
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._initialized:
+            self._initialize(conn)
+        return conn
+
+    def _initialize(self, conn: sqlite3.Connection) -> None:
+        with self._init_lock:
+            if self._initialized:
+                return
+            # IMMEDIATE 事务：多个 worker 同时启动时只有一个执行导入
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # executescript 会先隐式 COMMIT，这里逐条执行建表语句
+                for statement in SCHEMA.strip().split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                imported = conn.execute("SELECT value FROM meta WHERE key = 'imported'").fetchone()
+                if imported is None:
+                    if self._legacy is not None:
+                        self._import(conn, self._legacy.load_aggregates())
+                    conn.execute("INSERT INTO meta VALUES ('imported', 1)")
+                    conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._initialized = True
+
+    def _import(self, conn: sqlite3.Connection, aggregates: dict[str, Any]) -> None:
+        conn.executemany(
+            "INSERT INTO modules VALUES (?, ?, ?, ?)",
+            [
+                (name, m["installs"], m.get("last_install"), m.get("last_target_dir"))
+                for name, m in aggregates["modules"].items()
+            ],
+        )
+        for granularity, *_ in GRANULARITIES:
+            conn.executemany(
+                "INSERT INTO buckets VALUES (?, ?, ?, ?)",
+                [
+                    (granularity, bucket, module, n)
+                    for bucket, counts in aggregates.get(granularity, {}).items()
+                    for module, n in counts.items()
+                ],
+            )
+
+    # --- 写 ---
+
+    def record(self, module: str, target_dir: str) -> None:
+        self.record_many([module], target_dir)
+
+    def record_many(self, modules: list[str], target_dir: str) -> None:
+        if not modules:
+            return
+        now = datetime.now(timezone.utc)
+        timestamp = now.isoformat()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                """
+                INSERT INTO modules VALUES (?, 1, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    installs = installs + 1,
+                    last_install = excluded.last_install,
+                    last_target_dir = excluded.last_target_dir
+                """,
+                [(module, timestamp, target_dir) for module in modules],
+            )
+            for granularity, length, retention, fmt in GRANULARITIES:
+                conn.executemany(
+                    """
+                    INSERT INTO buckets VALUES (?, ?, ?, 1)
+                    ON CONFLICT(granularity, bucket, module) DO UPDATE SET installs = installs + 1
+                    """,
+                    [(granularity, timestamp[:length], module) for module in modules],
+                )
+                conn.execute(
+                    "DELETE FROM buckets WHERE granularity = ? AND bucket < ?",
+                    (granularity, (now - retention).strftime(fmt)),
+                )
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- 读 ---
+
+    @property
+    def version(self) -> int:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def totals(self) -> tuple[int, dict[str, int]]:
+        counts = dict(self._conn().execute("SELECT name, installs FROM modules"))
+        return sum(counts.values()), counts
+
+    def window(self, hours: int | None = None, days: int | None = None) -> dict[str, int]:
+        """最近 hours 小时（或 days 天，含今天）的安装数"""
+        now = datetime.now(timezone.utc)
+        if hours is not None:
+            granularity, since = "hourly", (now - timedelta(hours=hours - 1)).strftime("%Y-%m-%dT%H")
+        elif days is not None:
+            granularity, since = "daily", (now - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        else:
+            return self.totals()[1]
+        rows = self._conn().execute(
+            """
+            SELECT module, SUM(installs) FROM buckets
+            WHERE granularity = ? AND bucket >= ? GROUP BY module
+            """,
+            (granularity, since),
+        )
+        return dict(rows)
+
+    def snapshot(self) -> dict[str, Any]:
+        """与 InstallStats.snapshot() 相同的聚合格式"""
+        conn = self._conn()
+        modules = {
+            name: {"installs": n, "last_install": last, "last_target_dir": target}
+            for name, n, last, target in conn.execute("SELECT * FROM modules")
+        }
+        aggregates: dict[str, Any] = {
+            "version": STATS_VERSION,
+            "last_seq": 0,
+            "total_installs": sum(m["installs"] for m in modules.values()),
+            "modules": modules,
+        }
+        for granularity, *_ in GRANULARITIES:
+            buckets: dict[str, dict[str, int]] = {}
+            for bucket, module, n in conn.execute(
+                "SELECT bucket, module, installs FROM buckets WHERE granularity = ?",
+                (granularity,),
+            ):
+                buckets.setdefault(bucket, {})[module] = n
+            aggregates[granularity] = buckets
+        return aggregates
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,87 @@
+"""
+线程安全的 LRU 缓存，带命中/未命中计数，可选 TTL
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+_MISSING = object()
+
+
+class LRUCache:
+    """按条目数限制大小的 LRU 缓存；ttl（秒）不为 None 时条目写入后超时失效"""
+
+    def __init__(self, maxsize: int = 128, ttl: float | None = None) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize 必须大于 0")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl 必须大于 0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        # 值为 (value, 过期时间)，不设 ttl 时过期时间为 None
+        self._data: OrderedDict[Hashable, tuple[Any, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            value, expires = item
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                self.expired += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """查看但不计入命中统计、不调整 LRU 顺序"""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            return default
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
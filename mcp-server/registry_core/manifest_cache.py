@@ -0,0 +1,122 @@
+"""
+manifest.json 缓存与 API 文档预渲染
+
+按模块名缓存解析后的 manifest 和渲染好的 API 文档，
+用 manifest.json 的 (mtime_ns, size) 判断是否过期，LRU 限制条目数。
+"""
+
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from .lru_cache import LRUCache
+
+
+@dataclass(frozen=True)
+class CachedManifest:
+    signature: tuple[int, int]
+    manifest: dict[str, Any]
+    api_doc: str
+
+
+def render_api_doc(manifest: dict[str, Any]) -> str:
+    """构建 API 文档（不含源码）"""
+    doc_parts = [
+        f"# {manifest['name']}",
+        f"\n**类型:** {manifest['type']} | **语言:** {manifest['lang']}",
+        f"\n**简介:** {manifest['summary']}",
+    ]
+
+    # 安装信息
+    if install := manifest.get("install"):
+        doc_parts.append(f"\n## 安装")
+        if deps := install.get("dependencies"):
+            doc_parts.append(f"依赖: {', '.join(deps)}")
+        if entry_point := install.get("entry"):
+            doc_parts.append(f"导入: `{entry_point}`")
+
+    # API 定义
+    if api := manifest.get("api"):
+        doc_parts.append(f"\n## API")
+        doc_parts.append(json.dumps(api, ensure_ascii=False, indent=2))
+
+    # 适配点（component 专属）
+    if adapt := manifest.get("adapt_points"):
+        doc_parts.append(f"\n## 适配点")
+        for point in adapt:
+            doc_parts.append(f"- {point}")
+
+    # 设计决策（blueprint 专属）
+    if decisions := manifest.get("design_decisions"):
+        doc_parts.append(f"\n## 设计决策")
+        for d in decisions:
+            doc_parts.append(f"- {d}")
+
+    return "\n".join(doc_parts)
+
+
+class ManifestCache:
+    """
+    manifest 缓存。
+
+    - get(entry): 返回 CachedManifest，manifest.json 不存在时返回 None
+    - load(entry): 同 get()，但读取或解析失败时打印到 stderr 并返回 None（建索引用）
+    - warm_up(entries, limit): 预加载（最多 limit 个，且不超过 maxsize）
+    - set_backing(manifests): 挂上预编译快照，LRU 未命中且签名一致时直接用快照
+    """
+
+    def __init__(self, repo_root: Path, maxsize: int = 256) -> None:
+        self.repo_root = repo_root
+        self._lru = LRUCache(maxsize)
+        self._backing: dict[str, CachedManifest] = {}
+
+    def set_backing(self, manifests: dict[str, CachedManifest]) -> None:
+        self._backing = manifests
+
+    def manifest_path(self, entry: dict[str, Any]) -> Path:
+        return self.repo_root / entry["path"] / "manifest.json"
+
+    def get(self, entry: dict[str, Any]) -> CachedManifest | None:
+        path = self.manifest_path(entry)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            self._lru.pop(entry["name"])
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+
+        cached = self._lru.get(entry["name"])
+        if cached is not None and cached.signature == signature:
+            return cached
+
+        cached = self._backing.get(entry["name"])
+        if cached is not None and cached.signature == signature:
+            self._lru.put(entry["name"], cached)
+            return cached
+
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        cached = CachedManifest(signature, manifest, render_api_doc(manifest))
+        self._lru.put(entry["name"], cached)
+        return cached
+
+    def load(self, entry: dict[str, Any]) -> CachedManifest | None:
+        try:
+            return self.get(entry)
+        except (OSError, ValueError) as exc:
+            print(f"manifest 加载失败（{entry['name']}）: {exc}", file=sys.stderr)
+            return None
+
+    def warm_up(self, entries: Iterable[dict[str, Any]], limit: int | None = None) -> int:
+        cap = self._lru.maxsize if limit is None else min(limit, self._lru.maxsize)
+        loaded = 0
+        for entry in entries:
+            if loaded >= cap:
+                break
+            if self.load(entry) is not None:
+                loaded += 1
+        return loaded
+
+    def stats(self) -> dict[str, Any]:
+        return self._lru.stats()
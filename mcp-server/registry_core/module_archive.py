@@ -0,0 +1,196 @@
+"""
+模块预打包归档
+
+register.py 注册模块时把 src/ 的文件首尾相接写成 <name>.pack（不压缩），旁边写 <name>.json：
+归档的 sha256、(mtime_ns, size) + 每个文件的 {sha256, size, offset, mode, mtime_ns}。
+安装时只比对归档的 (mtime_ns, size) 与元数据，不遍历 src/、不逐个打开源文件：
+打开一个归档，按偏移 copy_file_range 到各目标文件。
+归档内容是注册时的源码，改了源码要重新运行 register.py。
+"""
+
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .content_store import (
+    FileInfo,
+    InstallReport,
+    content_manifest,
+    file_digest,
+    same_content,
+    temp_path,
+)
+from .lru_cache import LRUCache
+
+
+@dataclass(frozen=True)
+class ArchivedFile(FileInfo):
+    """归档中的一个文件：内容在归档里的偏移，以及安装后要恢复的权限和 mtime"""
+    offset: int
+    mode: int
+    mtime_ns: int
+
+
+def _files_from_json(files: dict[str, dict[str, Any]]) -> dict[str, ArchivedFile]:
+    return {
+        rel: ArchivedFile(info["sha256"], info["size"], info["offset"], info["mode"], info["mtime_ns"])
+        for rel, info in files.items()
+    }
+
+
+class ArchiveStore:
+    """
+    归档目录（<root>/<name>.pack + <name>.json）。
+
+    - build(name, src_dir): 打包并写元数据
+    - lookup(name): 归档与元数据一致时返回 (归档路径, 文件清单)
+    """
+
+    def __init__(self, root: Path, maxsize: int = 256) -> None:
+        self.root = root
+        # 模块名 -> (元数据文件签名, 元数据, 文件清单)，元数据文件变化后重新解析
+        self._meta = LRUCache(maxsize)
+
+    def archive_path(self, name: str) -> Path:
+        return self.root / f"{name}.pack"
+
+    def meta_path(self, name: str) -> Path:
+        return self.root / f"{name}.json"
+
+    def build(self, name: str, src_dir: Path) -> dict[str, Any]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        archive = self.archive_path(name)
+        tmp = temp_path(archive)
+
+        files: dict[str, dict[str, Any]] = {}
+        try:
+            with open(tmp, "wb") as out:
+                for rel, info in content_manifest(src_dir).items():
+                    src_file = src_dir / rel
+                    st = src_file.stat()
+                    files[rel] = {
+                        "sha256": info.sha256,
+                        "size": info.size,
+                        "offset": out.tell(),
+                        "mode": st.st_mode & 0o777,
+                        "mtime_ns": st.st_mtime_ns,
+                    }
+                    with open(src_file, "rb") as f:
+                        shutil.copyfileobj(f, out)
+            os.replace(tmp, archive)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+        st = archive.stat()
+        meta = {
+            "name": name,
+            "sha256": file_digest(archive),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "files": files,
+        }
+        meta_path = self.meta_path(name)
+        meta_tmp = temp_path(meta_path)
+        meta_tmp.write_text(json.dumps(meta, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        os.replace(meta_tmp, meta_path)
+        return meta
+
+    def lookup(self, name: str) -> tuple[Path, dict[str, ArchivedFile]] | None:
+        """
+        归档存在且 (mtime_ns, size) 与元数据记录一致时返回 (归档路径, 文件清单)。
+        只 stat 两个文件，不读源码目录；归档被替换或元数据是旧格式时返回 None。
+        """
+        meta_path = self.meta_path(name)
+        archive = self.archive_path(name)
+        try:
+            meta_st = meta_path.stat()
+            st = archive.stat()
+        except FileNotFoundError:
+            return None
+
+        signature = (meta_st.st_mtime_ns, meta_st.st_size)
+        cached = self._meta.get(name)
+        if cached is None or cached[0] != signature:
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                files = _files_from_json(meta["files"])
+            except (OSError, ValueError, KeyError):
+                return None
+            cached = (signature, meta, files)
+            self._meta.put(name, cached)
+
+        _signature, meta, files = cached
+        if (meta.get("mtime_ns"), meta.get("size")) != (st.st_mtime_ns, st.st_size):
+            return None
+        return archive, files
+
+
+def _safe_path(rel: str) -> bool:
+    path = Path(rel)
+    return not path.is_absolute() and ".." not in path.parts
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, size: int) -> None:
+    """把归档 [offset, offset + size) 写入 dst：copy_file_range，不支持时退回 pread"""
+    if hasattr(os, "copy_file_range"):
+        try:
+            copied = 0
+            while copied < size:
+                n = os.copy_file_range(src_fd, dst_fd, size - copied, offset + copied)
+                if n == 0:
+                    break
+                copied += n
+            if copied == size:
+                return
+        except OSError:
+            pass
+        os.lseek(dst_fd, 0, os.SEEK_SET)
+        os.ftruncate(dst_fd, 0)
+    remaining, pos = size, offset
+    while remaining > 0:
+        chunk = os.pread(src_fd, min(remaining, 1 << 20), pos)
+        if not chunk:
+            raise OSError(f"归档在偏移 {pos} 处提前结束")
+        os.write(dst_fd, chunk)
+        remaining -= len(chunk)
+        pos += len(chunk)
+
+
+def extract_archive(archive: Path, dest: Path, files: dict[str, ArchivedFile]) -> InstallReport:
+    """按偏移把归档里的文件写到 dest，内容未变化的文件跳过；全部未变化时不打开归档"""
+    report = InstallReport()
+    pending: dict[str, bool] = {}
+    for rel, info in files.items():
+        if not _safe_path(rel):
+            continue
+        dst_file = dest / rel
+        existed = dst_file.exists()
+        if existed and same_content(dst_file, info, private=True):
+            report.skipped.append(rel)
+        else:
+            pending[rel] = existed
+    if not pending:
+        return report
+
+    with open(archive, "rb") as src:
+        for rel, existed in pending.items():
+            info = files[rel]
+            dst_file = dest / rel
+            dst_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = temp_path(dst_file)
+            try:
+                with open(tmp, "wb") as out:
+                    _copy_range(src.fileno(), out.fileno(), info.offset, info.size)
+                os.chmod(tmp, info.mode)
+                os.utime(tmp, ns=(info.mtime_ns, info.mtime_ns))
+                os.replace(tmp, dst_file)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+            report.bytes_written += info.size
+            (report.changed if existed else report.added).append(rel)
+    return report
@@ -0,0 +1,143 @@
+"""
+registry.json 进程内缓存
+
+启动时加载一次 registry.json，之后由后台线程轮询文件 mtime/size，
+变化时重新解析并整体替换快照。读路径只拿当前快照引用，不加锁、不碰磁盘。
+"""
+
+import json
+import sys
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    """某一时刻的 registry 只读视图"""
+    generation: int
+    entries: tuple[dict[str, Any], ...]
+    by_name: dict[str, dict[str, Any]] = field(repr=False)
+    signature: tuple[int, int] | None = None
+
+
+EMPTY_SNAPSHOT = RegistrySnapshot(generation=0, entries=(), by_name={})
+
+ReloadListener = Callable[[RegistrySnapshot, RegistrySnapshot], None]
+
+
+def _file_signature(path: Path) -> tuple[int, int] | None:
+    """文件的 (mtime_ns, size)，不存在时返回 None"""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class RegistryCache:
+    """
+    registry.json 的进程级缓存。
+
+    - snapshot(): 返回当前快照（首次调用时同步加载）
+    - refresh(): 检查文件签名，有变化则重新加载，返回是否重载
+    - prime(): 用预编译快照里的条目直接填充
+    - start()/stop(): 启停后台轮询线程
+    - add_listener(): 注册重载回调 (old, new)，用于同步派生索引
+    """
+
+    def __init__(self, path: Path, poll_interval: float = 1.0) -> None:
+        self.path = path
+        self.poll_interval = poll_interval
+        self._snapshot = EMPTY_SNAPSHOT
+        self._loaded = False
+        self._reload_lock = threading.Lock()
+        self._listeners: list[ReloadListener] = []
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def snapshot(self) -> RegistrySnapshot:
+        if not self._loaded:
+            self.refresh()
+        return self._snapshot
+
+    def entries(self) -> tuple[dict[str, Any], ...]:
+        return self.snapshot().entries
+
+    def get(self, name: str) -> dict[str, Any] | None:
+        return self.snapshot().by_name.get(name)
+
+    @property
+    def generation(self) -> int:
+        return self.snapshot().generation
+
+    def add_listener(self, listener: ReloadListener) -> None:
+        self._listeners.append(listener)
+
+    def refresh(self) -> bool:
+        """签名变化时重新加载；并发调用只有一个线程真正解析文件"""
+        with self._reload_lock:
+            signature = _file_signature(self.path)
+            if self._loaded and signature == self._snapshot.signature:
+                return False
+            try:
+                modules = self._read_modules() if signature else []
+            except (OSError, ValueError):
+                # 写入过程中读到半个文件：保留旧快照，等下一轮再试
+                if self._loaded:
+                    return False
+                modules = []
+            self._install(modules, signature)
+        return True
+
+    def prime(self, modules: list[dict[str, Any]], signature: tuple[int, int] | None) -> None:
+        """用外部已解析好的条目（如预编译快照）填充缓存，跳过 JSON 解析"""
+        with self._reload_lock:
+            self._install(modules, signature)
+
+    def file_signature(self) -> tuple[int, int] | None:
+        return _file_signature(self.path)
+
+    def _install(self, modules: list[dict[str, Any]], signature: tuple[int, int] | None) -> None:
+        old = self._snapshot
+        new = RegistrySnapshot(
+            generation=old.generation + 1,
+            entries=tuple(modules),
+            by_name={m["name"]: m for m in modules},
+            signature=signature,
+        )
+        self._snapshot = new
+        self._loaded = True
+        # 在锁内回调，保证派生索引按 generation 顺序更新
+        for listener in self._listeners:
+            listener(old, new)
+
+    def _read_modules(self) -> list[dict[str, Any]]:
+        data = json.loads(self.path.read_text(encoding="utf-8"))
+        return data.get("modules", [])
+
+    def start(self) -> None:
+        """加载并启动后台轮询线程（重复调用无副作用）"""
+        self.snapshot()
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="registry-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as exc:  # 轮询线程不能因单次失败退出
+                print(f"registry 重载失败: {exc}", file=sys.stderr)
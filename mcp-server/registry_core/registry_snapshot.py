@@ -0,0 +1,137 @@
+"""
+预编译的 registry 快照
+
+register.py 写完 registry.json 后生成 .module-store/registry.snapshot（pickle）：
+registry 条目、全部 manifest 及渲染好的 API 文档、建好的搜索索引（含逐词 BM25 分数），
+装了 NumPy 时还包括语义搜索的向量矩阵。
+server 启动时 mmap 快照文件直接反序列化，不再逐个读 manifest、解析 JSON、重建索引。
+反序列化本身仍与快照大小成正比（1 万个模块约 20 MB，加载数百毫秒），
+只是比常规加载的常数小得多；冷启动时间仍随模块数线性增长。
+
+快照记录 registry.json 的 sha256，内容不一致时视为过期，server 走常规加载。
+快照只由本仓库的 register.py 生成，pickle 不用于不可信数据。
+
+语义索引的文档向量矩阵单独存成 embeddings-<sha>.npy，加载时 np.load(mmap_mode="r")：
+多 worker 部署时各进程共享同一份只读页，不各自复制一份。
+"""
+
+import copy
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import sys
+from pathlib import Path
+from typing import Any
+
+from .manifest_cache import CachedManifest, render_api_doc
+from .search_index import SearchIndex, document_facets, document_fields
+from . import semantic_index
+
+SNAPSHOT_VERSION = 4
+
+
+def registry_digest(registry_bytes: bytes) -> str:
+    return hashlib.sha256(registry_bytes).hexdigest()
+
+
+def build_snapshot(repo_root: Path, registry_path: Path) -> dict[str, Any]:
+    registry_bytes = registry_path.read_bytes()
+    modules = json.loads(registry_bytes).get("modules", [])
+
+    manifests: dict[str, CachedManifest] = {}
+    index = SearchIndex()
+    semantic_docs: dict[str, list[str]] = {}
+    for entry in modules:
+        manifest_path = repo_root / entry["path"] / "manifest.json"
+        manifest = None
+        if manifest_path.exists():
+            try:
+                st = manifest_path.stat()
+                manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as exc:
+                # 坏掉的 manifest 不进快照，该模块只按 registry 条目建索引
+                print(f"manifest 加载失败（{entry['name']}）: {exc}", file=sys.stderr)
+            else:
+                manifests[entry["name"]] = CachedManifest(
+                    (st.st_mtime_ns, st.st_size), manifest, render_api_doc(manifest)
+                )
+        index.add(entry["name"], document_fields(entry, manifest), document_facets(entry))
+        semantic_docs[entry["name"]] = semantic_index.semantic_terms(entry, manifest)
+
+    index.warm()
+    return {
+        "version": SNAPSHOT_VERSION,
+        "registry_sha256": registry_digest(registry_bytes),
+        "modules": modules,
+        "manifests": manifests,
+        "search_index": index,
+        "semantic_index": (
+            semantic_index.SemanticIndex.build(semantic_docs)
+            if semantic_index.available() else None
+        ),
+    }
+
+
+def _write_embeddings(directory: Path, semantic: "semantic_index.SemanticIndex") -> str:
+    """向量矩阵写入 embeddings-<sha>.npy（内容寻址，旧文件顺带清理），返回文件名"""
+    np = semantic_index.np
+    data = np.ascontiguousarray(semantic.embeddings, dtype=np.float32)
+    name = f"embeddings-{hashlib.sha256(data.tobytes()).hexdigest()[:16]}.npy"
+    target = directory / name
+    if not target.exists():
+        tmp = directory / f".{name}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp, target)
+    for stale in directory.glob("embeddings-*.npy"):
+        if stale.name != name:
+            stale.unlink(missing_ok=True)
+    return name
+
+
+def write_snapshot(path: Path, snapshot: dict[str, Any]) -> int:
+    """原子写入快照，返回字节数"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if (semantic := snapshot.get("semantic_index")) is not None:
+        # 向量矩阵不进 pickle，快照里只记文件名
+        snapshot = dict(snapshot)
+        snapshot["semantic_embeddings"] = _write_embeddings(path.parent, semantic)
+        semantic = copy.copy(semantic)
+        semantic.embeddings = None
+        snapshot["semantic_index"] = semantic
+    data = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def load_snapshot(path: Path, registry_bytes: bytes) -> dict[str, Any] | None:
+    """快照存在、版本匹配且与 registry.json 内容一致时返回快照"""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            snapshot = pickle.loads(mm)
+    except (FileNotFoundError, ValueError, pickle.UnpicklingError, EOFError, AttributeError,
+            ImportError):
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if snapshot.get("registry_sha256") != registry_digest(registry_bytes):
+        return None
+    if (semantic := snapshot.get("semantic_index")) is not None:
+        semantic.embeddings = _load_embeddings(path.parent, snapshot.get("semantic_embeddings"))
+        if semantic.embeddings is None or len(semantic.embeddings) != len(semantic):
+            # 向量文件缺失或不匹配时丢弃语义索引，server 首次语义查询时重建
+            snapshot["semantic_index"] = None
+    return snapshot
+
+
+def _load_embeddings(directory: Path, name: str | None):
+    if not name or not semantic_index.available():
+        return None
+    try:
+        return semantic_index.np.load(directory / name, mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,321 @@
+"""
+模块搜索倒排索引
+
+按字段（tags / name / summary / api）建倒排表，BM25 打分并按字段加权，
+用堆取 top-k。词项来自 tokenizer：拉丁词 + CJK 字符 n-gram。支持按模块增删文档，registry 变化时只重建变动的模块。
+
+另外按 type / lang / tags 维护 facet 值 -> 模块集合，过滤时先求交集得到候选集，
+打分只累加候选模块。
+"""
+
+import bisect
+import heapq
+import math
+import threading
+from collections import Counter
+from typing import Any
+
+from .tokenizer import tokenize
+
+# 字段权重：标签最精准，其次模块名，API 签名只作补充
+FIELD_BOOSTS: dict[str, float] = {
+    "tags": 3.0,
+    "name": 2.5,
+    "summary": 1.0,
+    "api": 0.6,
+}
+
+# 查询词不在词表中时，按前缀扩展的最大词数和折扣
+PREFIX_EXPANSIONS = 8
+PREFIX_DISCOUNT = 0.5
+
+# 支持过滤的 facet；tags 多值，过滤时要求全部命中
+FACETS = ("type", "lang", "tags")
+
+
+def document_fields(
+    entry: dict[str, Any], manifest: dict[str, Any] | None = None
+) -> dict[str, list[str]]:
+    """把 registry 条目（和可选的 manifest）转成各字段的词列表"""
+    name = entry["name"].lower()
+    tags = [t.lower() for t in entry.get("tags", [])]
+
+    tag_terms: list[str] = []
+    for tag in tags:
+        tag_terms.append(tag)
+        parts = tokenize(tag)
+        if parts != [tag]:
+            tag_terms.extend(parts)
+
+    api_terms: list[str] = []
+    if manifest and (api := manifest.get("api")):
+        for signature, desc in _walk_api(api):
+            api_terms.extend(tokenize(signature))
+            api_terms.extend(tokenize(desc))
+
+    return {
+        "tags": tag_terms,
+        "name": [name, *tokenize(name)],
+        "summary": tokenize(entry.get("summary", "")),
+        "api": api_terms,
+    }
+
+
+def document_facets(entry: dict[str, Any]) -> dict[str, list[str]]:
+    """registry 条目的 facet 值（统一小写）"""
+    return {
+        "type": [entry["type"].lower()],
+        "lang": [entry["lang"].lower()],
+        "tags": [t.lower() for t in entry.get("tags", [])],
+    }
+
+
+def _walk_api(api: Any) -> list[tuple[str, str]]:
+    """展开 manifest.api（可能按文件分组嵌套）为 (签名, 说明) 列表"""
+    pairs: list[tuple[str, str]] = []
+    if isinstance(api, dict):
+        for key, value in api.items():
+            if isinstance(value, dict):
+                pairs.extend(_walk_api(value))
+            else:
+                pairs.append((str(key), str(value)))
+    return pairs
+
+
+class SearchIndex:
+    """
+    BM25 倒排索引。
+
+    - add(doc_id, fields, facets): 新增或替换文档
+    - remove(doc_id): 删除文档
+    - candidates(filters): facet 过滤后的文档集合，无过滤条件时返回 None
+    - search(query, top_k, candidates): 返回 [(doc_id, score)]，按分数降序
+    - ranked(query, top_k, candidates): (命中总数, search 的结果)
+    - scores(query, candidates): {doc_id: score}，未排序
+    - warm(): 预算全部词的分数（增删文档后失效）
+    """
+
+    def __init__(
+        self,
+        boosts: dict[str, float] | None = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        self.boosts = dict(boosts or FIELD_BOOSTS)
+        self.k1 = k1
+        self.b = b
+        # term -> field -> doc_id -> tf
+        self._postings: dict[str, dict[str, dict[str, int]]] = {}
+        self._doc_freq: Counter[str] = Counter()
+        self._doc_fields: dict[str, dict[str, Counter[str]]] = {}
+        self._doc_lengths: dict[str, dict[str, int]] = {}
+        self._field_totals: Counter[str] = Counter()
+        # facet -> 值 -> doc_id 集合；doc_id -> facet 值（删除时用）
+        self._facets: dict[str, dict[str, set[str]]] = {}
+        self._doc_facets: dict[str, dict[str, list[str]]] = {}
+        self._lock = threading.Lock()
+        # 修改后失效的派生数据
+        self._term_scores: dict[str, dict[str, float]] = {}
+        self._vocab: list[str] | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # 锁和词表不进快照；warm() 算好的逐词分数随快照保存，各 worker 加载后不用再算
+        state = self.__dict__.copy()
+        for key in ("_lock", "_vocab"):
+            state.pop(key)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._term_scores = state.get("_term_scores", {})
+        self._vocab = None
+
+    def __len__(self) -> int:
+        return len(self._doc_fields)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_fields
+
+    def add(
+        self,
+        doc_id: str,
+        fields: dict[str, list[str]],
+        facets: dict[str, list[str]] | None = None,
+    ) -> None:
+        with self._lock:
+            self._remove(doc_id)
+            if facets:
+                self._doc_facets[doc_id] = facets
+                for facet, values in facets.items():
+                    by_value = self._facets.setdefault(facet, {})
+                    for value in values:
+                        by_value.setdefault(value, set()).add(doc_id)
+            counted = {f: Counter(terms) for f, terms in fields.items() if f in self.boosts}
+            self._doc_fields[doc_id] = counted
+            self._doc_lengths[doc_id] = {f: len(fields[f]) for f in counted}
+            seen: set[str] = set()
+            for field_name, counts in counted.items():
+                self._field_totals[field_name] += len(fields[field_name])
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {}).setdefault(field_name, {})[doc_id] = tf
+                    seen.add(term)
+            for term in seen:
+                self._doc_freq[term] += 1
+            self._invalidate()
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            if self._remove(doc_id):
+                self._invalidate()
+
+    def _remove(self, doc_id: str) -> bool:
+        for facet, values in self._doc_facets.pop(doc_id, {}).items():
+            by_value = self._facets[facet]
+            for value in values:
+                by_value[value].discard(doc_id)
+                if not by_value[value]:
+                    del by_value[value]
+        counted = self._doc_fields.pop(doc_id, None)
+        if counted is None:
+            return False
+        lengths = self._doc_lengths.pop(doc_id)
+        seen: set[str] = set()
+        for field_name, counts in counted.items():
+            self._field_totals[field_name] -= lengths[field_name]
+            for term in counts:
+                by_field = self._postings[term]
+                by_field[field_name].pop(doc_id, None)
+                if not by_field[field_name]:
+                    del by_field[field_name]
+                if not by_field:
+                    del self._postings[term]
+                seen.add(term)
+        for term in seen:
+            self._doc_freq[term] -= 1
+            if self._doc_freq[term] <= 0:
+                del self._doc_freq[term]
+        return True
+
+    def warm(self) -> int:
+        """
+        预先算好所有词的 BM25 分数，查询时不再有冷词打分。
+        逐词持锁，期间的查询不用等全部算完；返回新算的词数。
+        """
+        with self._lock:
+            terms = [t for t in self._postings if t not in self._term_scores]
+        for term in terms:
+            with self._lock:
+                if term in self._postings:
+                    self._score_term(term)
+        return len(terms)
+
+    def _invalidate(self) -> None:
+        self._term_scores.clear()
+        self._vocab = None
+
+    def candidates(self, filters: dict[str, list[str]]) -> set[str] | None:
+        """各条件取交集；值统一小写比较"""
+        result: set[str] | None = None
+        with self._lock:
+            for facet, values in filters.items():
+                by_value = self._facets.get(facet, {})
+                for value in values:
+                    docs = by_value.get(value.lower(), set())
+                    result = set(docs) if result is None else result & docs
+                    if not result:
+                        return set()
+        return result
+
+    def search(
+        self, query: str, top_k: int | None = None, candidates: set[str] | None = None
+    ) -> list[tuple[str, float]]:
+        return self.ranked(query, top_k, candidates)[1]
+
+    def ranked(
+        self, query: str, top_k: int | None = None, candidates: set[str] | None = None
+    ) -> tuple[int, list[tuple[str, float]]]:
+        """(命中总数, 前 top_k 个结果)：总数即命中数，只对前 top_k 名排序，不对全部命中排序"""
+        scores = self.scores(query, candidates)
+        # BM25 的 idf 和查询词权重都为正，命中文档的分数都大于 0
+        if top_k is not None and len(scores) > top_k:
+            # 先用堆取第 top_k 高的分数作门槛，只排序不低于门槛的文档（并列时按 doc_id）
+            threshold = heapq.nlargest(top_k, scores.values())[-1]
+            best = sorted((-score, doc_id) for doc_id, score in scores.items() if score >= threshold)
+            best = best[:top_k]
+        else:
+            best = sorted((-score, doc_id) for doc_id, score in scores.items())
+        return len(scores), [(doc_id, -neg) for neg, doc_id in best]
+
+    def scores(self, query: str, candidates: set[str] | None = None) -> dict[str, float]:
+        """各命中文档的 BM25 分数（未排序）"""
+        # 查询词去重：同一关键词集合的查询排名一致（server 按集合缓存结果）
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return {}
+        with self._lock:
+            scores: dict[str, float] = {}
+            for term, weight in self._expand(terms).items():
+                term_scores = self._score_term(term)
+                if candidates is None:
+                    hits = term_scores.items()
+                elif len(candidates) < len(term_scores):
+                    # 候选集较小时只查候选模块
+                    hits = ((d, term_scores[d]) for d in candidates if d in term_scores)
+                else:
+                    hits = ((d, sc) for d, sc in term_scores.items() if d in candidates)
+                if not scores and weight == 1.0:
+                    # 第一个精确匹配的词直接复制（dict 复制在 C 里完成）
+                    scores = dict(hits)
+                    continue
+                for doc_id, score in hits:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * score
+        return scores
+
+    def _expand(self, terms: list[str]) -> dict[str, float]:
+        """查询词 -> 权重；未命中词表的词按前缀扩展"""
+        weights: dict[str, float] = {}
+        for term in terms:
+            if term in self._postings:
+                weights[term] = weights.get(term, 0.0) + 1.0
+                continue
+            # 单个拉丁字母前缀太宽；单个汉字则扩展到以它开头的 n-gram
+            if len(term) < 2 and term.isascii():
+                continue
+            for candidate in self._prefix_matches(term):
+                weights[candidate] = weights.get(candidate, 0.0) + PREFIX_DISCOUNT
+        return weights
+
+    def _prefix_matches(self, prefix: str) -> list[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self._postings)
+        start = bisect.bisect_left(self._vocab, prefix)
+        matches = []
+        for term in self._vocab[start:start + PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def _score_term(self, term: str) -> dict[str, float]:
+        """单个词对所有文档的 BM25 分数（跨字段加权求和），按词缓存"""
+        cached = self._term_scores.get(term)
+        if cached is not None:
+            return cached
+
+        total_docs = len(self._doc_fields)
+        df = self._doc_freq.get(term, 0)
+        idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+        k1, b = self.k1, self.b
+
+        scores: dict[str, float] = {}
+        for field_name, postings in self._postings.get(term, {}).items():
+            boost = self.boosts[field_name]
+            avg_len = self._field_totals[field_name] / total_docs or 1.0
+            for doc_id, tf in postings.items():
+                doc_len = self._doc_lengths[doc_id][field_name]
+                norm = tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len / avg_len))
+                scores[doc_id] = scores.get(doc_id, 0.0) + boost * idf * norm
+
+        self._term_scores[term] = scores
+        return scores
@@ -0,0 +1,165 @@
+"""
+语义搜索（可选，依赖 NumPy）
+
+不联网、不下载模型：摘要、标签、API 签名和说明经 tokenizer 切词，
+再加上拉丁词的字符 trigram（让 "mail" 和 "email" 有交集），
+哈希到固定维度做 TF-IDF，然后 LSA 降维得到文档向量矩阵。
+查询时一次矩阵-向量乘积 + argpartition 取 top-k。
+
+未安装 NumPy 时 available() 返回 False，server 退回纯关键词搜索。
+NumPy 在第一次调用 available() 时才导入，只做关键词搜索的进程不付出导入开销。
+"""
+
+import math
+import zlib
+from collections import Counter
+from typing import Any
+
+from .tokenizer import tokenize
+
+HASH_DIMS = 1024
+LSA_DIMS = 128
+_LATIN_MIN_LEN = 4
+# 余弦相似度低于该值的结果视为不相关，不返回
+MIN_SIMILARITY = 0.1
+
+# 可选依赖，available() 首次调用时导入；_MISSING 表示还没尝试过
+_MISSING = object()
+np: Any = _MISSING
+
+
+def available() -> bool:
+    global np
+    if np is _MISSING:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np is not None
+
+
+def semantic_terms(entry: dict[str, Any], manifest: dict[str, Any] | None = None) -> list[str]:
+    """模块的语义特征：词 + 拉丁词字符 trigram"""
+    parts = [entry["name"], entry.get("summary", ""), *entry.get("tags", [])]
+    if manifest and isinstance(manifest.get("api"), dict):
+        stack = [manifest["api"]]
+        while stack:
+            for key, value in stack.pop().items():
+                parts.append(str(key))
+                if isinstance(value, dict):
+                    stack.append(value)
+                else:
+                    parts.append(str(value))
+    return query_terms(" ".join(parts))
+
+
+def query_terms(text: str, unique: bool = False) -> list[str]:
+    terms = tokenize(text)
+    if unique:
+        terms = list(dict.fromkeys(terms))
+    grams = []
+    for term in terms:
+        if len(term) >= _LATIN_MIN_LEN and term.isascii() and term.isalpha():
+            padded = f"#{term}#"
+            grams.extend("~" + padded[i:i + 3] for i in range(len(padded) - 2))
+    return terms + grams
+
+
+def _bucket(term: str) -> tuple[int, float]:
+    h = zlib.crc32(term.encode("utf-8"))
+    return h % HASH_DIMS, (1.0 if (h >> 31) & 1 else -1.0)
+
+
+def _hashed_tf(terms: list[str]) -> "np.ndarray":
+    vec = np.zeros(HASH_DIMS, dtype=np.float32)
+    for term, count in Counter(terms).items():
+        idx, sign = _bucket(term)
+        vec[idx] += sign * (1.0 + math.log(count))
+    return vec
+
+
+def _normalize_rows(m: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+class SemanticIndex:
+    """
+    - build(docs): docs 为 {模块名: 语义特征}，返回建好的索引
+    - search(query, top_k, candidates, min_score): [(模块名, 余弦相似度)]，可限定候选模块，
+      低于 min_score 的结果不返回
+    - ranked(...): (不低于 min_score 的文档数, search 的结果)
+    """
+
+    def __init__(self, names: list[str], idf: "np.ndarray",
+                 projection: "np.ndarray", embeddings: "np.ndarray") -> None:
+        self.names = names
+        self.idf = idf
+        self.projection = projection
+        self.embeddings = embeddings
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def build(cls, docs: dict[str, list[str]], dims: int = LSA_DIMS) -> "SemanticIndex":
+        available()
+        names = list(docs)
+        if not names:
+            empty = np.zeros((0, 1), dtype=np.float32)
+            return cls([], np.ones(HASH_DIMS, dtype=np.float32),
+                       np.zeros((HASH_DIMS, 1), dtype=np.float32), empty)
+
+        tf = np.stack([_hashed_tf(docs[name]) for name in names])
+        df = np.count_nonzero(tf, axis=0)
+        idf = (np.log((1 + len(names)) / (1 + df)) + 1).astype(np.float32)
+        x = _normalize_rows(tf * idf)
+
+        # LSA：取 X 的前 k 个右奇异向量作为投影。文档多于维度时对 XᵀX 做特征分解更省
+        k = max(1, min(dims, len(names), HASH_DIMS))
+        if len(names) <= HASH_DIMS:
+            _, _, vt = np.linalg.svd(x, full_matrices=False)
+            projection = vt[:k].T
+        else:
+            eigvals, eigvecs = np.linalg.eigh(x.T @ x)
+            projection = eigvecs[:, np.argsort(eigvals)[::-1][:k]]
+        projection = projection.astype(np.float32)
+
+        embeddings = _normalize_rows(x @ projection).astype(np.float32)
+        return cls(names, idf, projection, embeddings)
+
+    def search(
+        self, query: str, top_k: int | None = None, candidates: set[str] | None = None,
+        min_score: float = MIN_SIMILARITY,
+    ) -> list[tuple[str, float]]:
+        return self.ranked(query, top_k, candidates, min_score)[1]
+
+    def ranked(
+        self, query: str, top_k: int | None = None, candidates: set[str] | None = None,
+        min_score: float = MIN_SIMILARITY,
+    ) -> tuple[int, list[tuple[str, float]]]:
+        """(相似度不低于 min_score 的文档数, 前 top_k 个结果)"""
+        if not self.names or not available():
+            return 0, []
+        q = _hashed_tf(query_terms(query, unique=True)) * self.idf
+        if not q.any():
+            return 0, []
+        # 按投影前的范数归一化：查询落在文档子空间外的部分（生词、无关词）拉低相似度，
+        # 而不是投影后再拉伸到单位长度
+        q = (q / np.linalg.norm(q)) @ self.projection
+        scores = self.embeddings @ q
+        if candidates is not None:
+            rows = [i for i, name in enumerate(self.names) if name in candidates]
+            mask = np.full(len(self.names), -np.inf, dtype=scores.dtype)
+            mask[rows] = 0.0
+            scores = scores + mask
+
+        total = int(np.count_nonzero(scores >= min_score))
+        k = min(total, len(self.names) if top_k is None else top_k)
+        if k == 0:
+            return total, []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return total, [(self.names[i], float(scores[i])) for i in top]
@@ -0,0 +1,485 @@
+"""
+registry 检索和安装的核心逻辑（不依赖 MCP / Web 框架）
+
+server.py 的 MCP 工具和 `python -m registry_core` 命令行共用这里的状态：
+registry 缓存、关键词 / 语义索引、搜索结果缓存、manifest 缓存、安装统计。
+导入本模块只做对象构造，不读文件、不起线程；NumPy 在首次语义查询时导入，
+sqlite3 只在 sqlite 统计后端下导入。
+"""
+
+import heapq
+import os
+import threading
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from . import semantic_index
+from .content_store import INSTALL_MODES, ContentStore, InstallReport, content_manifest, install_tree
+from .install_log import DAILY_RETENTION, HOURLY_RETENTION, InstallJournal, InstallStats
+from .lru_cache import LRUCache
+from .manifest_cache import ManifestCache
+from .module_archive import ArchiveStore, extract_archive
+from .registry_cache import RegistryCache, RegistrySnapshot
+from .registry_snapshot import build_snapshot, load_snapshot, write_snapshot
+from .search_index import FACETS, SearchIndex, document_facets, document_fields
+from .semantic_index import SemanticIndex, semantic_terms
+from .tokenizer import tokenize
+
+# 默认是本仓库；基准测试用 SELF_IMPROVE_REPO_ROOT 指向合成的 registry
+REPO_ROOT = Path(
+    os.environ.get("SELF_IMPROVE_REPO_ROOT") or Path(__file__).resolve().parent.parent.parent
+)
+REGISTRY_PATH = REPO_ROOT / "registry.json"
+MODULES_ROOT = REPO_ROOT / "modules"
+STATS_PATH = REPO_ROOT / "stats.json"
+INSTALL_JOURNAL_PATH = REPO_ROOT / "installs.jsonl"
+CONTENT_STORE_PATH = REPO_ROOT / ".module-store"
+ARCHIVES_PATH = CONTENT_STORE_PATH / "archives"
+SNAPSHOT_PATH = CONTENT_STORE_PATH / "registry.snapshot"
+INSTALL_DB_PATH = REPO_ROOT / "installs.db"
+
+# 安装统计后端：journal（单进程，JSONL 日志 + stats.json）或 sqlite（多 worker 共享）
+STATS_BACKEND = os.environ.get("SELF_IMPROVE_STATS_BACKEND", "journal")
+
+# manifest 缓存条目数（解析后的 manifest + 渲染好的 API 文档）
+MANIFEST_CACHE_SIZE = int(os.environ.get("SELF_IMPROVE_MANIFEST_CACHE_SIZE", "256"))
+
+registry_cache = RegistryCache(REGISTRY_PATH)
+search_index = SearchIndex()
+manifest_cache = ManifestCache(REPO_ROOT, maxsize=MANIFEST_CACHE_SIZE)
+install_journal = InstallJournal(INSTALL_JOURNAL_PATH, STATS_PATH)
+if STATS_BACKEND == "sqlite":
+    from .install_store import SQLiteInstallStats
+
+    # 首次创建数据库时导入 journal 里已有的统计
+    install_stats = SQLiteInstallStats(INSTALL_DB_PATH, legacy=install_journal)
+else:
+    install_stats = InstallStats(install_journal)
+content_store = ContentStore(CONTENT_STORE_PATH)
+archive_store = ArchiveStore(ARCHIVES_PATH)
+
+# 搜索每页默认 / 最大结果数
+SEARCH_TOP_K = 20
+SEARCH_MAX_LIMIT = 100
+
+# keyword: BM25；semantic: LSA 向量；hybrid: 两者加权（需要 NumPy）
+SEARCH_MODES = ("keyword", "semantic", "hybrid")
+# hybrid 模式下归一化关键词分数的权重，其余给语义相似度
+HYBRID_KEYWORD_WEIGHT = 0.6
+
+# 搜索结果缓存：条目数、TTL（秒）；registry 重载时整体失效
+SEARCH_CACHE_SIZE = int(os.environ.get("SELF_IMPROVE_SEARCH_CACHE_SIZE", "512"))
+SEARCH_CACHE_TTL = float(os.environ.get("SELF_IMPROVE_SEARCH_CACHE_TTL", "300"))
+search_cache = LRUCache(SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+
+
+def load_stats() -> dict:
+    """按模块聚合的安装统计快照（内存计数器的副本）"""
+    return install_stats.snapshot()
+
+
+def record_install(module_name: str, target_dir: str) -> None:
+    """记录一次模块安装（追加写日志 + 累加内存计数器）"""
+    install_stats.record(module_name, target_dir)
+
+
+def record_installs(module_names: list[str], target_dir: str) -> None:
+    """批量记录安装，日志一次写入"""
+    if module_names:
+        install_stats.record_many(module_names, target_dir)
+
+
+# 小时桶 / 天桶覆盖的最长窗口
+MAX_WINDOW_HOURS = int(HOURLY_RETENTION.total_seconds()) // 3600
+MAX_WINDOW_DAYS = DAILY_RETENTION.days
+WINDOW_FORMAT_ERROR = f"window 格式应为 <N>h 或 <N>d，且不超过 {MAX_WINDOW_DAYS} 天"
+
+
+def parse_window(value: str) -> dict[str, int] | None:
+    """
+    '24h' -> {"hours": 24}，'7d' -> {"days": 7}。
+    超过小时桶保留期的小时窗口改用天桶（按天向上取整）；超过天桶保留期返回 None，
+    否则更早的安装已被清理，结果会少算。
+    """
+    unit, amount = value[-1:], value[:-1]
+    if unit not in ("h", "d") or not amount.isdigit() or int(amount) <= 0:
+        return None
+    n = int(amount)
+    if unit == "h" and n <= MAX_WINDOW_HOURS:
+        return {"hours": n}
+    days = n if unit == "d" else -(-n // 24)
+    return {"days": days} if days <= MAX_WINDOW_DAYS else None
+
+
+def window_bucket(window: dict[str, int]) -> str:
+    """窗口当前所在的 UTC 小时 / 天桶；进入下一个桶后旧安装会滑出窗口"""
+    fmt = "%Y-%m-%dT%H" if "hours" in window else "%Y-%m-%d"
+    return datetime.now(timezone.utc).strftime(fmt)
+
+
+def load_registry() -> Sequence[dict[str, Any]]:
+    """返回缓存中的模块索引（registry.json 变化后由后台线程重载）"""
+    return registry_cache.entries()
+
+
+def load_manifest(module_entry: dict[str, Any]) -> dict[str, Any] | None:
+    """根据 registry 条目加载对应的 manifest.json（经 manifest_cache）"""
+    cached = manifest_cache.get(module_entry)
+    return cached.manifest if cached else None
+
+
+# 模块名 -> 建索引时的 (registry 条目, manifest 签名)
+_indexed: dict[str, tuple[dict[str, Any], tuple[int, int] | None]] = {}
+
+
+def sync_search_index(old: RegistrySnapshot, new: RegistrySnapshot) -> None:
+    """
+    registry 重载后增量更新搜索索引：只重建新增、变更或 manifest 有改动的模块。
+    manifest 读取或解析失败的模块只按 registry 条目建索引，不中断其余模块和后续回调。
+    """
+    changed = False
+    for name in _indexed.keys() - new.by_name.keys():
+        search_index.remove(name)
+        del _indexed[name]
+        changed = True
+
+    for name, entry in new.by_name.items():
+        cached = manifest_cache.load(entry)
+        state = (entry, cached.signature if cached else None)
+        if name in search_index and _indexed.get(name) == state:
+            continue
+        search_index.add(
+            name, document_fields(entry, cached.manifest if cached else None),
+            document_facets(entry),
+        )
+        _indexed[name] = state
+        changed = True
+
+    # 在重载线程里预算逐词分数，冷词打分不落到查询上
+    if changed:
+        search_index.warm()
+
+
+registry_cache.add_listener(sync_search_index)
+
+
+# (registry generation, 语义索引)；首次语义查询时构建，之后随 registry 重载在后台重建
+_semantic: tuple[int, SemanticIndex] | None = None
+_semantic_lock = threading.Lock()
+
+
+def _build_semantic(snapshot: RegistrySnapshot) -> tuple[int, SemanticIndex]:
+    docs = {}
+    for entry in snapshot.entries:
+        cached = manifest_cache.load(entry)
+        docs[entry["name"]] = semantic_terms(entry, cached.manifest if cached else None)
+    return snapshot.generation, SemanticIndex.build(docs)
+
+
+def get_semantic_index() -> SemanticIndex | None:
+    """
+    首次调用时构建（耗时与模块数成正比，调用方应在线程池里执行）。
+    之后由 sync_semantic_index 在 registry 重载时后台重建，重建期间返回旧索引，
+    已下架的模块由 search() 按当前 registry 过滤掉。
+    """
+    global _semantic
+    if not semantic_index.available():
+        return None
+    current = _semantic
+    if current is None:
+        with _semantic_lock:
+            current = _semantic
+            if current is None:
+                current = _semantic = _build_semantic(registry_cache.snapshot())
+    return current[1]
+
+
+def sync_semantic_index(old: RegistrySnapshot, new: RegistrySnapshot) -> None:
+    """语义索引用过之后，registry 重载时在后台线程重建，避免落到请求路径上"""
+    global _semantic
+    if _semantic is not None:
+        with _semantic_lock:
+            _semantic = _build_semantic(new)
+
+
+registry_cache.add_listener(sync_semantic_index)
+
+
+def load_registry_snapshot() -> bool:
+    """
+    用 register.py 生成的预编译快照填充 registry、manifest 缓存和搜索索引。
+    快照缺失或与 registry.json 不一致时返回 False，走常规加载。
+    """
+    global search_index, _semantic
+
+    signature = registry_cache.file_signature()
+    if signature is None:
+        return False
+    snapshot = load_snapshot(SNAPSHOT_PATH, REGISTRY_PATH.read_bytes())
+    if snapshot is None:
+        return False
+
+    manifests = snapshot["manifests"]
+    manifest_cache.set_backing(manifests)
+    search_index = snapshot["search_index"]
+    for entry in snapshot["modules"]:
+        cached = manifests.get(entry["name"])
+        _indexed[entry["name"]] = (entry, cached.signature if cached else None)
+    # 快照之后 manifest 有改动的模块，会在 sync_search_index 里单独重建
+    registry_cache.prime(snapshot["modules"], signature)
+    if snapshot.get("semantic_index") is not None:
+        _semantic = (registry_cache.generation, snapshot["semantic_index"])
+    return True
+
+
+def ensure_snapshot() -> None:
+    """快照缺失或过期时先生成一份，多个 worker 启动时直接加载，不各自重建索引"""
+    registry_bytes = REGISTRY_PATH.read_bytes()
+    if load_snapshot(SNAPSHOT_PATH, registry_bytes) is None:
+        write_snapshot(SNAPSHOT_PATH, build_snapshot(REPO_ROOT, REGISTRY_PATH))
+
+
+def _summarize(entry: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "name": entry["name"],
+        "type": entry["type"],
+        "lang": entry["lang"],
+        "summary": entry["summary"],
+    }
+
+
+def _ranked(
+    query: str, mode: str, candidates: set[str] | None, depth: int | None
+) -> tuple[int, list[tuple[str, float]]]:
+    """(匹配总数, 前 depth 个结果)；depth 为 None 时返回完整排名"""
+    semantic = get_semantic_index() if mode != "keyword" else None
+    if semantic is None:
+        return search_index.ranked(query, depth, candidates)
+    if mode == "semantic":
+        return semantic.ranked(query, depth, candidates)
+
+    # hybrid：关键词分数按最高分归一化后与余弦相似度加权；
+    # 语义结果已按 MIN_SIMILARITY 截断，低相似度的模块不参与融合
+    keyword_scores = {
+        name: score for name, score in search_index.scores(query, candidates).items() if score > 0
+    }
+    top_score = max(keyword_scores.values(), default=1.0)
+    combined: dict[str, float] = {}
+    for name, score in keyword_scores.items():
+        combined[name] = HYBRID_KEYWORD_WEIGHT * score / top_score
+    for name, score in semantic.search(query, candidates=candidates):
+        combined[name] = combined.get(name, 0.0) + (1 - HYBRID_KEYWORD_WEIGHT) * score
+    ranked = ((-score, name) for name, score in combined.items())
+    best = sorted(ranked) if depth is None else heapq.nsmallest(depth, ranked)
+    return len(combined), [(name, -neg) for neg, name in best]
+
+
+def normalize_query(query: str) -> frozenset[str]:
+    """查询归一化为关键词集合：大小写、词序、重复词、标点不影响结果"""
+    return frozenset(tokenize(query))
+
+
+def invalidate_search_cache(old: RegistrySnapshot, new: RegistrySnapshot) -> None:
+    search_cache.clear()
+
+
+registry_cache.add_listener(invalidate_search_cache)
+
+
+def normalize_filters(filters: dict[str, Any] | None) -> tuple[tuple[str, tuple[str, ...]], ...]:
+    """{"type": "utility", "tags": ["Auth"]} -> (("tags", ("auth",)), ("type", ("utility",)))"""
+    normalized = []
+    for facet in FACETS:
+        values = (filters or {}).get(facet)
+        if not values:
+            continue
+        if isinstance(values, str):
+            values = [values]
+        normalized.append((facet, tuple(sorted({v.lower() for v in values}))))
+    return tuple(normalized)
+
+
+def search(
+    query: str,
+    limit: int | None = SEARCH_TOP_K,
+    mode: str = "keyword",
+    filters: dict[str, Any] | None = None,
+    offset: int = 0,
+) -> tuple[int, list[dict[str, Any]]]:
+    """返回 (匹配总数, 当前页结果)；filters 为 type / lang / tags 过滤条件"""
+    return _search(query, limit, mode, filters, offset, cached_only=False)
+
+
+def cached_search(
+    query: str,
+    limit: int | None = SEARCH_TOP_K,
+    mode: str = "keyword",
+    filters: dict[str, Any] | None = None,
+    offset: int = 0,
+) -> tuple[int, list[dict[str, Any]]] | None:
+    """只查搜索结果缓存：命中时返回与 search() 相同的结果，否则返回 None（不排名）"""
+    return _search(query, limit, mode, filters, offset, cached_only=True)
+
+
+def _search(
+    query: str,
+    limit: int | None,
+    mode: str,
+    filters: dict[str, Any] | None,
+    offset: int,
+    cached_only: bool,
+) -> tuple[int, list[dict[str, Any]]] | None:
+    snapshot = registry_cache.snapshot()
+    facet_filters = normalize_filters(filters)
+    end = None if limit is None else offset + limit
+
+    # 空查询按 registry 顺序返回全部（过滤后的）模块
+    if not query.strip():
+        if cached_only:
+            return None
+        candidates = search_index.candidates(dict(facet_filters)) if facet_filters else None
+        entries = [
+            entry for entry in snapshot.entries
+            if candidates is None or entry["name"] in candidates
+        ]
+        return len(entries), [_summarize(entry) for entry in entries[offset:end]]
+
+    # key 带上 generation：重载与查询并发时也不会拿旧排名当新结果。
+    # 只排前 depth 名（至少 SEARCH_MAX_LIMIT），总数单独计数；
+    # 翻页不超出已排名部分时直接切片，更深的页重新排名后替换缓存
+    cache_key = (snapshot.generation, mode, normalize_query(query), facet_filters)
+    if cached_only and search_cache.peek(cache_key) is None:
+        # 未命中由随后真正排名的 search() 计数
+        return None
+    cached = search_cache.get(cache_key)
+    if cached is not None and (
+        cached[0] is None or (end is not None and end <= cached[0])
+        or len(cached[2]) == cached[1]
+    ):
+        _depth, total, ranked = cached
+    elif cached_only:
+        return None
+    else:
+        candidates = search_index.candidates(dict(facet_filters)) if facet_filters else None
+        depth = None if end is None else max(end, SEARCH_MAX_LIMIT)
+        total, ranked = _ranked(query, mode, candidates, depth)
+        search_cache.put(cache_key, (depth, total, ranked))
+
+    results = []
+    for name, _score in ranked[offset:end]:
+        if entry := snapshot.by_name.get(name):
+            results.append(_summarize(entry))
+    return total, results
+
+
+def find_entry(name: str) -> dict[str, Any] | None:
+    """按 name 查找 registry 条目"""
+    return registry_cache.get(name)
+
+
+def api_doc_or_error(module_name: str) -> str:
+    entry = find_entry(module_name)
+    if not entry:
+        return f"模块 '{module_name}' 不存在"
+
+    cached = manifest_cache.get(entry)
+    if not cached:
+        return f"模块 '{module_name}' 的 manifest.json 缺失"
+
+    return cached.api_doc
+
+
+class InstallError(Exception):
+    """安装失败，消息直接返回给 agent"""
+
+
+@dataclass
+class InstallResult:
+    module: str
+    dest: Path
+    report: InstallReport
+    install_info: dict[str, Any]
+
+
+# 每次安装成功后调用 (mode, report)，server 用它累加安装字节数 / 文件数指标
+InstallListener = Callable[[str, InstallReport], None]
+_install_listeners: list[InstallListener] = []
+
+
+def add_install_listener(listener: InstallListener) -> None:
+    _install_listeners.append(listener)
+
+
+def install_one(module_name: str, target_dir: str, mode: str = "copy") -> InstallResult:
+    """安装单个模块（不记录统计），失败时抛 InstallError"""
+    entry = find_entry(module_name)
+    if not entry:
+        raise InstallError(f"模块 '{module_name}' 不存在")
+
+    if entry["type"] == "blueprint":
+        raise InstallError(f"blueprint 类型模块不支持安装，请用 get_module_api 查看架构指导")
+
+    manifest = load_manifest(entry)
+    if not manifest:
+        raise InstallError(f"manifest.json 缺失")
+
+    # 源码目录
+    src_dir = REPO_ROOT / entry["path"] / "src"
+    if not src_dir.exists():
+        raise InstallError(f"源码目录不存在: {src_dir}")
+    if mode not in INSTALL_MODES:
+        raise InstallError(f"未知安装模式: {mode}")
+
+    # 目标目录: target_dir/module_name/
+    module_slug = module_name.replace("-", "_")
+    dest = Path(target_dir).resolve() / module_slug
+    dest.mkdir(parents=True, exist_ok=True)
+
+    # 按内容哈希安装：内容相同的文件跳过。
+    # copy 模式优先从注册时生成的归档流式解压（不遍历 src/），归档缺失或失效时逐文件复制
+    archived = archive_store.lookup(module_name) if mode == "copy" else None
+    if archived:
+        archive, files = archived
+        report = extract_archive(archive, dest, files)
+    else:
+        files = content_manifest(src_dir)
+        report = install_tree(src_dir, dest, files, store=content_store, mode=mode)
+
+    for listener in _install_listeners:
+        listener(mode, report)
+    return InstallResult(module_name, dest, report, manifest.get("install", {}))
+
+
+def format_files(report: InstallReport) -> list[str]:
+    parts = []
+    if report.added:
+        parts.append(f"新增文件: {', '.join(report.added)}")
+    if report.changed:
+        parts.append(f"更新文件: {', '.join(report.changed)}")
+    if report.skipped:
+        parts.append(f"未变化(跳过): {', '.join(report.skipped)}")
+    return parts
+
+
+def format_install(result: InstallResult) -> str:
+    """单个模块的安装结果：目标路径、文件变化、依赖、导入方式"""
+    install_info = result.install_info
+    result_parts = [f"✅ 模块 '{result.module}' 已安装到 {result.dest}"]
+    result_parts.extend(format_files(result.report))
+    if deps := install_info.get("dependencies"):
+        result_parts.append(f"需安装依赖: {', '.join(deps)}")
+    if entry_point := install_info.get("entry"):
+        result_parts.append(f"导入方式: {entry_point}")
+    return "\n".join(result_parts)
+
+
+def merge_dependencies(results: list[InstallResult]) -> list[str]:
+    """合并各模块 install.dependencies，按首次出现顺序去重"""
+    merged: dict[str, None] = {}
+    for result in results:
+        for dep in result.install_info.get("dependencies", []):
+            merged.setdefault(dep.strip(), None)
+    return list(merged)
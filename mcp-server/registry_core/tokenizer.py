@@ -0,0 +1,48 @@
+"""
+搜索分词
+
+- 拉丁文本：小写化后按非字母数字切词，含下划线的标识符额外保留完整形式
+- CJK 文本：连续汉字（及假名、谚文）切成字符 bigram + trigram，
+  单字成段时保留单字
+
+索引和查询共用同一套分词，"邮件模板" 与 "SMTP 邮件发送组件：Jinja2 模板渲染"
+通过 "邮件"、"模板" 两个 bigram 命中，不需要逐条做子串扫描。
+"""
+
+import re
+
+NGRAM_SIZES = (2, 3)
+
+_CJK_CHARS = (
+    "぀-ヿ"  # 平假名、片假名
+    "㐀-䶿"  # CJK 扩展 A
+    "一-鿿"  # CJK 统一汉字
+    "가-힯"  # 谚文音节
+    "豈-﫿"  # CJK 兼容汉字
+)
+_TOKEN_RE = re.compile(rf"(?P<cjk>[{_CJK_CHARS}]+)|(?P<word>[^\W_{_CJK_CHARS}]+)")
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def cjk_ngrams(run: str) -> list[str]:
+    """连续 CJK 字符串 -> n-gram 列表"""
+    if len(run) == 1:
+        return [run]
+    grams: list[str] = []
+    for size in NGRAM_SIZES:
+        grams.extend(run[i:i + size] for i in range(len(run) - size + 1))
+    return grams
+
+
+def tokenize(text: str) -> list[str]:
+    """把任意文本切成索引词"""
+    terms: list[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        if run := match.group("cjk"):
+            terms.extend(cjk_ngrams(run))
+        else:
+            terms.append(match.group("word"))
+    terms.extend(
+        ident.lower() for ident in _IDENT_RE.findall(text) if "_" in ident.strip("_")
+    )
+    return terms
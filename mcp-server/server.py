@@ -2,293 +2,417 @@
 """
 Self-Improve Module Registry MCP Server
 
-提供三个 tool 供 agent 按需检索和安装代码模块：
-- search_modules: 搜索模块
-- get_module_api: 查看模块 API（不含源码）
-- install_module: 安装模块到项目路径
+提供以下 tool 供 agent 按需检索和安装代码模块：
+- search_modules: 搜索模块（关键词 / 语义 / 混合）
+- get_module_api / get_modules_api: 查看单个 / 多个模块 API（不含源码）
+- install_module / install_modules: 安装单个 / 多个模块到项目路径
+
+传输方式：SSE（/sse）、无状态 Streamable HTTP（/mcp）、stdio（--transport stdio）
 """
 
+import argparse
+import asyncio
 import json
-import shutil
+import os
 import sys
+from collections.abc import Callable
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any
 
 import uvicorn
+from jsonschema import Draft202012Validator, ValidationError
 from mcp import types
 from mcp.server import Server
 from mcp.server.sse import SseServerTransport
+from mcp.server.stdio import stdio_server
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from starlette.applications import Starlette
-from starlette.responses import HTMLResponse, JSONResponse
+from starlette.middleware import Middleware
+from starlette.responses import HTMLResponse, JSONResponse, Response
 from starlette.routing import Route
 
-REPO_ROOT = Path(__file__).parent.parent
-REGISTRY_PATH = REPO_ROOT / "registry.json"
-MODULES_ROOT = REPO_ROOT / "modules"
-STATS_PATH = REPO_ROOT / "stats.json"
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, MetricsRegistry
+from registry_core.content_store import INSTALL_MODES, InstallReport
+from registry_core.registry_cache import RegistrySnapshot
+from registry_core.search_index import FACETS
+from registry_core.service import (
+    SEARCH_MAX_LIMIT,
+    SEARCH_MODES,
+    SEARCH_TOP_K,
+    WINDOW_FORMAT_ERROR,
+    InstallError,
+    InstallResult,
+    add_install_listener,
+    api_doc_or_error,
+    cached_search,
+    ensure_snapshot,
+    format_files,
+    format_install,
+    install_journal,
+    install_one,
+    install_stats,
+    load_registry_snapshot,
+    manifest_cache,
+    merge_dependencies,
+    parse_window,
+    record_install,
+    record_installs,
+    registry_cache,
+    search,
+    search_cache,
+    window_bucket,
+)
+from tool_executor import ToolBusyError, ToolExecutor
 
 server = Server("self-improve-modules")
 
+# 启动时预加载的 manifest 数（含渲染好的 API 文档），0 表示不预加载；不超过 manifest 缓存大小
+MANIFEST_WARMUP = int(os.environ.get("SELF_IMPROVE_MANIFEST_WARMUP", "256"))
 
-def load_stats() -> dict:
-    """加载安装统计数据"""
-    if not STATS_PATH.exists():
-        return {"installs": []}
-    return json.loads(STATS_PATH.read_text(encoding="utf-8"))
+# 文件 I/O 线程池：总线程数、单工具并发上限、单工具最大排队数
+IO_WORKERS = int(os.environ.get("SELF_IMPROVE_IO_WORKERS", "8"))
+TOOL_CONCURRENCY = {
+    "get_module_api": int(os.environ.get("SELF_IMPROVE_API_CONCURRENCY", "8")),
+    "install_module": int(os.environ.get("SELF_IMPROVE_INSTALL_CONCURRENCY", "2")),
+}
+TOOL_MAX_PENDING = int(os.environ.get("SELF_IMPROVE_TOOL_MAX_PENDING", "32"))
 
+tool_executor = ToolExecutor(
+    max_workers=IO_WORKERS, limits=TOOL_CONCURRENCY, max_pending=TOOL_MAX_PENDING
+)
 
-def save_stats(stats: dict) -> None:
-    """保存安装统计数据"""
-    STATS_PATH.write_text(
-        json.dumps(stats, ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
-    )
+metrics = MetricsRegistry()
+TOOL_CALLS = metrics.counter(
+    "selfimprove_tool_calls_total", "MCP 工具调用次数", ("tool", "status")
+)
+TOOL_LATENCY = metrics.histogram(
+    "selfimprove_tool_duration_seconds", "MCP 工具调用耗时（含线程池排队）", ("tool",)
+)
+HTTP_REQUESTS = metrics.counter(
+    "selfimprove_http_requests_total", "HTTP 请求数", ("route", "method", "status")
+)
+HTTP_LATENCY = metrics.histogram(
+    "selfimprove_http_request_duration_seconds", "HTTP 请求耗时（不含 SSE 长连接）", ("route",)
+)
+SSE_CONNECTIONS = metrics.gauge("selfimprove_sse_connections", "当前打开的 SSE 会话数")
+REGISTRY_RELOADS = metrics.counter("selfimprove_registry_reloads_total", "registry 重载次数")
+SSE_CONNECTIONS.set(0)
+REGISTRY_RELOADS.inc(0)
+INSTALL_BYTES = metrics.counter(
+    "selfimprove_install_bytes_written_total", "安装写入目标目录的字节数", ("mode",)
+)
+INSTALL_FILES = metrics.counter(
+    "selfimprove_install_files_total", "安装处理的文件数", ("mode", "result")
+)
 
 
-def record_install(module_name: str, target_dir: str) -> None:
-    """记录一次模块安装"""
-    from datetime import datetime, timezone
-    stats = load_stats()
-    stats["installs"].append({
-        "module": module_name,
-        "target_dir": target_dir,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    })
-    save_stats(stats)
+def count_registry_reload(old: RegistrySnapshot, new: RegistrySnapshot) -> None:
+    REGISTRY_RELOADS.inc()
 
 
-def load_registry() -> list[dict[str, Any]]:
-    """从 registry.json 加载模块索引"""
-    if not REGISTRY_PATH.exists():
-        return []
-    data = json.loads(REGISTRY_PATH.read_text(encoding="utf-8"))
-    return data.get("modules", [])
+registry_cache.add_listener(count_registry_reload)
 
 
-def load_manifest(module_entry: dict[str, Any]) -> dict[str, Any] | None:
-    """根据 registry 条目加载对应的 manifest.json"""
-    manifest_path = REPO_ROOT / module_entry["path"] / "manifest.json"
-    if not manifest_path.exists():
-        return None
-    return json.loads(manifest_path.read_text(encoding="utf-8"))
-
-
-def search(query: str) -> list[dict[str, Any]]:
-    registry = load_registry()
-    query_lower = query.strip().lower()
-    keywords = query_lower.split()
-
-    # 空查询返回全部模块
-    if not keywords:
-        return [
-            {
-                "name": entry["name"],
-                "type": entry["type"],
-                "lang": entry["lang"],
-                "summary": entry["summary"],
-            }
-            for entry in registry
-        ]
-
-    scored: list[tuple[int, dict]] = []
-
-    for entry in registry:
-        score = 0
-        tags = [t.lower() for t in entry.get("tags", [])]
-        name = entry["name"].lower()
-        summary = entry.get("summary", "").lower()
-
-        for kw in keywords:
-            if kw in tags:
-                score += 10
-            if kw in name:
-                score += 5
-            if kw in summary:
-                score += 1
-
-        if score > 0:
-            scored.append((score, {
-                "name": entry["name"],
-                "type": entry["type"],
-                "lang": entry["lang"],
-                "summary": entry["summary"],
-            }))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [item for _, item in scored]
-
-
-def find_entry(name: str) -> dict[str, Any] | None:
-    """按 name 查找 registry 条目"""
-    for entry in load_registry():
-        if entry["name"] == name:
-            return entry
-    return None
+def count_install(mode: str, report: InstallReport) -> None:
+    INSTALL_BYTES.inc(report.bytes_written, mode=mode)
+    for result, paths in (
+        ("added", report.added), ("changed", report.changed), ("skipped", report.skipped)
+    ):
+        if paths:
+            INSTALL_FILES.inc(len(paths), mode=mode, result=result)
 
 
-@server.list_tools()
-async def list_tools() -> list[types.Tool]:
-    return [
-        types.Tool(
-            name="search_modules",
-            description="搜索可复用代码模块，返回匹配的模块名和摘要列表",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "搜索关键词（匹配模块名、摘要、标签）",
-                    }
+add_install_listener(count_install)
+
+
+TOOLS = [
+    types.Tool(
+        name="search_modules",
+        description="搜索可复用代码模块，可按类型、语言、标签过滤，分页返回匹配的模块名和摘要",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "搜索关键词（匹配模块名、摘要、标签）",
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": list(SEARCH_MODES),
+                    "description": (
+                        "keyword（默认）: 关键词匹配；semantic: 语义相似度；"
+                        "hybrid: 两者加权，适合自然语言描述需求"
+                    ),
+                },
+                "type": {
+                    "type": "string",
+                    "enum": ["utility", "component", "blueprint"],
+                    "description": "只返回该类型的模块",
+                },
+                "lang": {
+                    "type": "string",
+                    "enum": ["python", "typescript", "shared"],
+                    "description": "只返回该语言的模块",
+                },
+                "tags": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "只返回包含全部这些标签的模块",
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": SEARCH_MAX_LIMIT,
+                    "description": f"每页结果数，默认 {SEARCH_TOP_K}",
+                },
+                "offset": {
+                    "type": "integer",
+                    "minimum": 0,
+                    "description": "跳过前 offset 个结果，用于翻页",
                 },
-                "required": ["query"],
             },
-        ),
-        types.Tool(
-            name="get_module_api",
-            description="查看模块的 API 文档（不含源码），了解如何使用该模块",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {
-                        "type": "string",
-                        "description": "模块名（从 search_modules 结果中获取）",
-                    }
+            "required": ["query"],
+        },
+    ),
+    types.Tool(
+        name="get_module_api",
+        description="查看模块的 API 文档（不含源码），了解如何使用该模块",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "name": {
+                    "type": "string",
+                    "description": "模块名（从 search_modules 结果中获取）",
+                }
+            },
+            "required": ["name"],
+        },
+    ),
+    types.Tool(
+        name="install_module",
+        description="安装模块到项目指定路径，复制源码文件",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "name": {
+                    "type": "string",
+                    "description": "模块名",
+                },
+                "target_dir": {
+                    "type": "string",
+                    "description": "安装目标路径（如 ./lib）",
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": list(INSTALL_MODES),
+                    "description": (
+                        "copy（默认）: 复制文件，支持时用 reflink；"
+                        "hardlink: 从本地内容库硬链接，文件只读，需要修改时请用 copy"
+                    ),
                 },
-                "required": ["name"],
             },
-        ),
-        types.Tool(
-            name="install_module",
-            description="安装模块到项目指定路径，复制源码文件",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {
-                        "type": "string",
-                        "description": "模块名",
-                    },
-                    "target_dir": {
-                        "type": "string",
-                        "description": "安装目标路径（如 ./lib）",
-                    },
+            "required": ["name", "target_dir"],
+        },
+    ),
+    types.Tool(
+        name="get_modules_api",
+        description="批量查看多个模块的 API 文档，一次调用返回全部",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "names": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "模块名列表",
+                }
+            },
+            "required": ["names"],
+        },
+    ),
+    types.Tool(
+        name="install_modules",
+        description="批量安装多个模块到同一路径，并发复制，返回合并去重后的依赖列表",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "names": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "模块名列表",
+                },
+                "target_dir": {
+                    "type": "string",
+                    "description": "安装目标路径（如 ./lib）",
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": list(INSTALL_MODES),
+                    "description": "同 install_module",
                 },
-                "required": ["name", "target_dir"],
             },
-        ),
-    ]
+            "required": ["names", "target_dir"],
+        },
+    ),
+]
+
+# 指标 label 只用已知工具名，防止客户端传任意 name 撑爆时间序列
+TOOL_NAMES = frozenset(tool.name for tool in TOOLS)
+
+# 参数校验器只编译一次。SDK 默认每次调用都用 jsonschema.validate 现场编译 schema
+# （连同元 schema 校验），占了无状态 HTTP 单次调用的大半耗时
+TOOL_VALIDATORS = {tool.name: Draft202012Validator(tool.inputSchema) for tool in TOOLS}
+
+
+@server.list_tools()
+async def list_tools() -> list[types.Tool]:
+    return TOOLS
 
 
-@server.call_tool()
+@server.call_tool(validate_input=False)
 async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
+    tool = name if name in TOOL_NAMES else "unknown"
+    status = "error"
+    with TOOL_LATENCY.time(tool=tool):
+        try:
+            if validator := TOOL_VALIDATORS.get(name):
+                try:
+                    validator.validate(arguments)
+                except ValidationError as exc:
+                    status = "invalid"
+                    raise ValueError(f"参数校验失败: {exc.message}") from None
+            result = await _dispatch_tool(name, arguments)
+            status = "ok"
+            return result
+        except ToolBusyError:
+            status = "busy"
+            return [types.TextContent(type="text", text=f"服务繁忙：{name} 排队已满，请稍后重试")]
+        finally:
+            TOOL_CALLS.inc(tool=tool, status=status)
+
+
+async def _dispatch_tool(name: str, arguments: dict) -> list[types.TextContent]:
+    # 搜索结果缓存命中时直接在事件循环里返回；未命中的排名（大 registry 上冷词打分
+    # 可达数十毫秒、语义索引首次查询要构建 LSA）和涉及文件 I/O 的工具一样进线程池
     if name == "search_modules":
-        return _handle_search(arguments["query"])
+        args = (
+            arguments["query"],
+            arguments.get("mode", "keyword"),
+            {facet: arguments.get(facet) for facet in FACETS},
+            arguments.get("limit", SEARCH_TOP_K),
+            arguments.get("offset", 0),
+        )
+        if (result := _handle_search(*args, cached_only=True)) is not None:
+            return result
+        return await tool_executor.run(name, _handle_search, *args)
     elif name == "get_module_api":
-        return _handle_get_api(arguments["name"])
+        return await tool_executor.run(name, _handle_get_api, arguments["name"])
     elif name == "install_module":
-        return _handle_install(arguments["name"], arguments["target_dir"])
+        return await tool_executor.run(
+            name, _handle_install, arguments["name"], arguments["target_dir"],
+            arguments.get("mode", "copy"),
+        )
+    elif name == "get_modules_api":
+        return await tool_executor.run(
+            "get_module_api", _handle_get_apis, arguments["names"]
+        )
+    elif name == "install_modules":
+        return await _handle_install_many(
+            arguments["names"], arguments["target_dir"], arguments.get("mode", "copy")
+        )
     return [types.TextContent(type="text", text=f"未知工具: {name}")]
 
 
-def _handle_search(query: str) -> list[types.TextContent]:
-    results = search(query)
-    if not results:
+def _handle_search(
+    query: str,
+    mode: str = "keyword",
+    filters: dict[str, Any] | None = None,
+    limit: int = SEARCH_TOP_K,
+    offset: int = 0,
+    cached_only: bool = False,
+) -> list[types.TextContent] | None:
+    """cached_only=True 时只查结果缓存，未命中返回 None"""
+    if mode not in SEARCH_MODES:
+        return [types.TextContent(type="text", text=f"未知搜索模式: {mode}")]
+    limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+    offset = max(0, int(offset))
+    lookup = cached_search if cached_only else search
+    found = lookup(query, limit=limit, mode=mode, filters=filters, offset=offset)
+    if found is None:
+        return None
+    total, results = found
+    if not total:
         return [types.TextContent(type="text", text="未找到匹配的模块")]
-    text = json.dumps(results, ensure_ascii=False, indent=2)
+    # 紧凑 JSON：结果直接进 agent 上下文，缩进只浪费 token
+    payload = {"total": total, "offset": offset, "results": results}
+    text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
     return [types.TextContent(type="text", text=text)]
 
 
 def _handle_get_api(module_name: str) -> list[types.TextContent]:
-    entry = find_entry(module_name)
-    if not entry:
-        return [types.TextContent(type="text", text=f"模块 '{module_name}' 不存在")]
-
-    manifest = load_manifest(entry)
-    if not manifest:
-        return [types.TextContent(type="text", text=f"模块 '{module_name}' 的 manifest.json 缺失")]
-
-    # 构建 API 文档（不含源码）
-    doc_parts = [
-        f"# {manifest['name']}",
-        f"\n**类型:** {manifest['type']} | **语言:** {manifest['lang']}",
-        f"\n**简介:** {manifest['summary']}",
-    ]
-
-    # 安装信息
-    if install := manifest.get("install"):
-        doc_parts.append(f"\n## 安装")
-        if deps := install.get("dependencies"):
-            doc_parts.append(f"依赖: {', '.join(deps)}")
-        if entry_point := install.get("entry"):
-            doc_parts.append(f"导入: `{entry_point}`")
-
-    # API 定义
-    if api := manifest.get("api"):
-        doc_parts.append(f"\n## API")
-        doc_parts.append(json.dumps(api, ensure_ascii=False, indent=2))
-
-    # 适配点（component 专属）
-    if adapt := manifest.get("adapt_points"):
-        doc_parts.append(f"\n## 适配点")
-        for point in adapt:
-            doc_parts.append(f"- {point}")
-
-    # 设计决策（blueprint 专属）
-    if decisions := manifest.get("design_decisions"):
-        doc_parts.append(f"\n## 设计决策")
-        for d in decisions:
-            doc_parts.append(f"- {d}")
-
-    return [types.TextContent(type="text", text="\n".join(doc_parts))]
-
-
-def _handle_install(module_name: str, target_dir: str) -> list[types.TextContent]:
-    entry = find_entry(module_name)
-    if not entry:
-        return [types.TextContent(type="text", text=f"模块 '{module_name}' 不存在")]
-
-    if entry["type"] == "blueprint":
-        return [types.TextContent(
-            type="text",
-            text=f"blueprint 类型模块不支持安装，请用 get_module_api 查看架构指导",
-        )]
-
-    manifest = load_manifest(entry)
-    if not manifest:
-        return [types.TextContent(type="text", text=f"manifest.json 缺失")]
-
-    # 源码目录
-    src_dir = REPO_ROOT / entry["path"] / "src"
-    if not src_dir.exists():
-        return [types.TextContent(type="text", text=f"源码目录不存在: {src_dir}")]
-
-    # 目标目录: target_dir/module_name/
-    module_slug = module_name.replace("-", "_")
-    dest = Path(target_dir).resolve() / module_slug
-    dest.mkdir(parents=True, exist_ok=True)
-
-    # 复制文件
-    copied = []
-    for src_file in src_dir.rglob("*"):
-        if src_file.is_file():
-            rel = src_file.relative_to(src_dir)
-            dst_file = dest / rel
-            dst_file.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src_file, dst_file)
-            copied.append(str(rel))
-
-    # 构建安装结果
-    install_info = manifest.get("install", {})
-    result_parts = [
-        f"✅ 模块 '{module_name}' 已安装到 {dest}",
-        f"复制文件: {', '.join(copied)}",
-    ]
-    if deps := install_info.get("dependencies"):
-        result_parts.append(f"需安装依赖: {', '.join(deps)}")
-    if entry_point := install_info.get("entry"):
-        result_parts.append(f"导入方式: {entry_point}")
+    return [types.TextContent(type="text", text=api_doc_or_error(module_name))]
+
+
+def _handle_get_apis(module_names: list[str]) -> list[types.TextContent]:
+    docs = [api_doc_or_error(name) for name in dict.fromkeys(module_names)]
+    return [types.TextContent(type="text", text="\n\n---\n\n".join(docs))]
+
+
+def _handle_install(
+    module_name: str, target_dir: str, mode: str = "copy"
+) -> list[types.TextContent]:
+    try:
+        result = install_one(module_name, target_dir, mode)
+    except InstallError as exc:
+        return [types.TextContent(type="text", text=str(exc))]
 
     record_install(module_name, target_dir)
 
+    return [types.TextContent(type="text", text=format_install(result))]
+
+
+async def _handle_install_many(
+    module_names: list[str], target_dir: str, mode: str = "copy"
+) -> list[types.TextContent]:
+    """并发安装多个模块，统计一次写入，依赖合并去重"""
+    names = list(dict.fromkeys(module_names))
+    outcomes = await asyncio.gather(
+        *(
+            tool_executor.run("install_module", install_one, name, target_dir, mode)
+            for name in names
+        ),
+        return_exceptions=True,
+    )
+
+    installed: list[InstallResult] = []
+    result_parts = []
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, InstallResult):
+            installed.append(outcome)
+            result_parts.append(f"✅ 模块 '{name}' 已安装到 {outcome.dest}")
+            result_parts.extend(f"  {line}" for line in format_files(outcome.report))
+        elif isinstance(outcome, InstallError):
+            result_parts.append(f"❌ {name}: {outcome}")
+        elif isinstance(outcome, ToolBusyError):
+            result_parts.append(f"❌ {name}: 服务繁忙，请稍后重试")
+        else:
+            raise outcome
+
+    if deps := merge_dependencies(installed):
+        result_parts.append(f"需安装依赖: {', '.join(deps)}")
+    entries = [r.install_info["entry"] for r in installed if r.install_info.get("entry")]
+    if entries:
+        result_parts.append("导入方式:")
+        result_parts.extend(f"  {entry_point}" for entry_point in entries)
+
+    # sqlite 统计后端的写事务在多 worker 争用时可能等到 busy timeout，不能跑在事件循环上
+    modules = [r.module for r in installed]
+    try:
+        await tool_executor.run("install_module", record_installs, modules, target_dir)
+    except ToolBusyError:
+        # 模块已经装好，排队满时也要计入统计
+        await asyncio.to_thread(record_installs, modules, target_dir)
+
     return [types.TextContent(type="text", text="\n".join(result_parts))]
 
 
@@ -300,18 +424,36 @@ sse = SseServerTransport("/messages/")
 
 
 async def handle_sse(request):
-    async with sse.connect_sse(
-        request.scope, request.receive, request._send
-    ) as streams:
-        await server.run(
-            streams[0], streams[1], server.create_initialization_options()
-        )
+    SSE_CONNECTIONS.inc()
+    try:
+        async with sse.connect_sse(
+            request.scope, request.receive, request._send
+        ) as streams:
+            await server.run(
+                streams[0], streams[1], server.create_initialization_options()
+            )
+    finally:
+        SSE_CONNECTIONS.dec()
 
 
 async def handle_messages(request):
     await sse.handle_post_message(request.scope, request.receive, request._send)
 
 
+# 无状态 Streamable HTTP：每次工具调用一个 POST，响应直接是 JSON，
+# 不建 SSE 长连接、不保存会话，任意 worker 都能处理
+http_session_manager = StreamableHTTPSessionManager(
+    app=server, stateless=True, json_response=True
+)
+
+
+class StreamableHTTPEndpoint:
+    """ASGI 端点（Route 收到类实例时按 ASGI app 调用，不包装成 Request）"""
+
+    async def __call__(self, scope, receive, send) -> None:
+        await http_session_manager.handle_request(scope, receive, send)
+
+
 # --- Dashboard routes ---
 async def dashboard_html(request):
     if not DASHBOARD_HTML_PATH.exists():
@@ -319,44 +461,194 @@ async def dashboard_html(request):
     return HTMLResponse(DASHBOARD_HTML_PATH.read_text(encoding="utf-8"))
 
 
+# (registry generation, 计数器版本, window, 当前桶) -> 已序列化的响应体
+_stats_response_cache: tuple[tuple, bytes] | None = None
+
+
 async def dashboard_stats(request):
-    registry = load_registry()
-    stats = load_stats()
-    install_counts: dict[str, int] = {}
-    for record in stats.get("installs", []):
-        name = record["module"]
-        install_counts[name] = install_counts.get(name, 0) + 1
+    window = request.query_params.get("window")
+    window_kwargs = parse_window(window) if window else None
+    if window and window_kwargs is None:
+        return JSONResponse({"error": WINDOW_FORMAT_ERROR}, status_code=400)
+
+    # sqlite 统计后端的读取可能等到 busy timeout，和写入一样不在事件循环上执行
+    try:
+        body = await tool_executor.run("dashboard_stats", _stats_body, window, window_kwargs)
+    except ToolBusyError:
+        return JSONResponse({"error": "服务繁忙，请稍后重试"}, status_code=503)
+    return Response(body, media_type="application/json")
+
+
+def _stats_body(window: str | None, window_kwargs: dict[str, int] | None) -> bytes:
+    global _stats_response_cache
+
+    snapshot = registry_cache.snapshot()
+    cache_key = (
+        snapshot.generation, install_stats.version, window,
+        window_bucket(window_kwargs) if window_kwargs else None,
+    )
+    if _stats_response_cache and _stats_response_cache[0] == cache_key:
+        return _stats_response_cache[1]
+
+    total_installs, install_counts = install_stats.totals()
+    window_counts = install_stats.window(**window_kwargs) if window_kwargs else None
 
     modules = []
-    for entry in registry:
-        modules.append({
+    for entry in snapshot.entries:
+        item = {
             "name": entry["name"],
             "type": entry["type"],
             "lang": entry["lang"],
             "summary": entry.get("summary", ""),
             "tags": entry.get("tags", []),
             "installs": install_counts.get(entry["name"], 0),
-        })
-
-    return JSONResponse({
-        "total_modules": len(registry),
-        "total_installs": len(stats.get("installs", [])),
+        }
+        if window_counts is not None:
+            item["window_installs"] = window_counts.get(entry["name"], 0)
+        modules.append(item)
+
+    payload = {
+        "total_modules": len(snapshot.entries),
+        "total_installs": total_installs,
         "modules": modules,
-    })
+    }
+    if window_counts is not None:
+        payload["window"] = window
+        payload["window_installs"] = sum(window_counts.values())
+
+    body = JSONResponse(payload).body
+    _stats_response_cache = (cache_key, body)
+    return body
+
+
+async def cache_stats(request):
+    """各缓存的命中/未命中计数，用于调整缓存大小"""
+    return JSONResponse(_cache_stats())
+
+
+def _cache_stats() -> dict[str, dict[str, Any]]:
+    return {"search": search_cache.stats(), "manifest": manifest_cache.stats()}
+
+
+def _cache_metric(key: str) -> Callable[[], dict[tuple[str, ...], float]]:
+    return lambda: {(cache,): stats[key] for cache, stats in _cache_stats().items()}
+
+
+# cache 和线程池已有自己的计数器，抓取时读取
+metrics.counter("selfimprove_cache_hits_total", "缓存命中次数", ("cache",), _cache_metric("hits"))
+metrics.counter("selfimprove_cache_misses_total", "缓存未命中次数", ("cache",), _cache_metric("misses"))
+metrics.gauge("selfimprove_cache_hit_ratio", "缓存命中率", ("cache",), _cache_metric("hit_ratio"))
+metrics.gauge("selfimprove_cache_entries", "缓存条目数", ("cache",), _cache_metric("size"))
+metrics.gauge(
+    "selfimprove_tool_running", "线程池中正在执行的工具调用数", ("tool",),
+    callback=lambda: {(tool,): st["running"] for tool, st in tool_executor.stats().items()},
+)
+metrics.gauge(
+    "selfimprove_tool_waiting", "等待并发名额的工具调用数", ("tool",),
+    callback=lambda: {(tool,): st["waiting"] for tool, st in tool_executor.stats().items()},
+)
+metrics.gauge(
+    "selfimprove_registry_modules", "registry 中的模块数",
+    callback=lambda: {(): len(registry_cache.entries())},
+)
+
+
+async def metrics_endpoint(request):
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
 
 # --- Starlette app ---
+
+
+@asynccontextmanager
+async def service_lifespan():
+    """registry / 索引 / 后台线程的启停，HTTP 和 stdio 模式共用"""
+    load_registry_snapshot()
+    registry_cache.start()
+    if MANIFEST_WARMUP > 0:
+        manifest_cache.warm_up(registry_cache.entries(), limit=MANIFEST_WARMUP)
+    try:
+        yield
+    finally:
+        registry_cache.stop()
+        tool_executor.shutdown()
+        install_journal.close()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    async with service_lifespan(), http_session_manager.run():
+        yield
+
+
+ROUTES = ("/sse", "/messages/", "/mcp", "/", "/api/stats", "/api/cache", "/metrics")
+
 app = Starlette(
+    lifespan=lifespan,
+    middleware=[
+        Middleware(
+            MetricsMiddleware, requests=HTTP_REQUESTS, latency=HTTP_LATENCY,
+            routes=ROUTES, skip_latency=("/sse",),
+        ),
+    ],
     routes=[
         Route("/sse", endpoint=handle_sse),
         Route("/messages/", endpoint=handle_messages, methods=["POST"]),
+        Route("/mcp", endpoint=StreamableHTTPEndpoint(), methods=["GET", "POST", "DELETE"]),
         Route("/", endpoint=dashboard_html),
         Route("/api/stats", endpoint=dashboard_stats),
+        Route("/api/cache", endpoint=cache_stats),
+        Route("/metrics", endpoint=metrics_endpoint),
     ],
 )
 
 
+async def run_stdio() -> None:
+    """单用户本地模式：通过 stdin/stdout 通信，不起 HTTP 服务"""
+    async with service_lifespan(), stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Self-Improve 模块检索 MCP Server")
+    parser.add_argument(
+        "--transport", choices=("http", "stdio"), default="http",
+        help="http（默认）: SSE（/sse）+ 无状态 Streamable HTTP（/mcp）；stdio: 本地单用户",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=MCP_PORT)
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="worker 进程数；大于 1 时安装统计改用 SQLite（installs.db）在进程间共享",
+    )
+    args = parser.parse_args(argv)
+
+    if args.transport == "stdio":
+        if args.workers > 1:
+            parser.error("stdio 模式不支持 --workers")
+        asyncio.run(run_stdio())
+        return 0
+
+    print(f"MCP SSE server: http://{args.host}:{args.port}/sse", file=sys.stderr)
+    print(f"MCP HTTP:       http://{args.host}:{args.port}/mcp", file=sys.stderr)
+    print(f"Dashboard:      http://{args.host}:{args.port}/", file=sys.stderr)
+    if args.workers <= 1:
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+        return 0
+
+    if os.environ.get("SELF_IMPROVE_STATS_BACKEND", "sqlite") != "sqlite":
+        parser.error("多 worker 模式的安装统计必须使用 sqlite 后端")
+    # 环境变量由 uvicorn 启动的 worker 子进程继承
+    os.environ["SELF_IMPROVE_STATS_BACKEND"] = "sqlite"
+    ensure_snapshot()
+    print(f"Workers:        {args.workers}（SSE 会话需要粘性路由，/mcp 无此限制）", file=sys.stderr)
+    # uvicorn 的 supervisor 在主进程绑定端口，worker 共享同一个监听 socket
+    uvicorn.run(
+        "server:app", host=args.host, port=args.port, workers=args.workers,
+        app_dir=str(Path(__file__).parent), log_level="warning",
+    )
+    return 0
+
+
 if __name__ == "__main__":
-    print(f"MCP SSE server: http://127.0.0.1:{MCP_PORT}/sse", file=sys.stderr)
-    print(f"Dashboard:      http://127.0.0.1:{MCP_PORT}/", file=sys.stderr)
-    uvicorn.run(app, host="127.0.0.1", port=MCP_PORT, log_level="warning")
+    sys.exit(main())
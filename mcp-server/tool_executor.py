@@ -0,0 +1,93 @@
+"""
+工具调用的有界线程池
+
+阻塞的文件 I/O（读 manifest、复制源码、写日志）不在事件循环里执行，
+统一丢给固定大小的线程池。每个工具有独立的并发上限，排队数超过
+max_pending 时直接拒绝，避免一个慢安装拖住其他会话的搜索。
+"""
+
+import asyncio
+import functools
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+R = TypeVar("R")
+
+
+class ToolBusyError(RuntimeError):
+    """某个工具的排队数已达上限"""
+
+
+class ToolExecutor:
+    """
+    - run(tool, fn, *args): 在线程池执行 fn，受 tool 的并发上限约束
+    - stats(): 各工具当前运行/排队数
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        limits: dict[str, int] | None = None,
+        default_limit: int | None = None,
+        max_pending: int = 64,
+    ) -> None:
+        self.max_workers = max_workers
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit or max_workers
+        self.max_pending = max_pending
+        self._pool: ThreadPoolExecutor | None = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._running: dict[str, int] = {}
+        self._waiting: dict[str, int] = {}
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="tool-io"
+            )
+        return self._pool
+
+    def _semaphore(self, tool: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(tool)
+        if sem is None:
+            sem = self._semaphores[tool] = asyncio.Semaphore(
+                self.limits.get(tool, self.default_limit)
+            )
+        return sem
+
+    async def run(self, tool: str, fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        sem = self._semaphore(tool)
+        if sem.locked() and self._waiting.get(tool, 0) >= self.max_pending:
+            raise ToolBusyError(tool)
+
+        self._waiting[tool] = self._waiting.get(tool, 0) + 1
+        try:
+            await sem.acquire()
+        finally:
+            self._waiting[tool] -= 1
+
+        self._running[tool] = self._running.get(tool, 0) + 1
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(fn, *args, **kwargs)
+            return await loop.run_in_executor(self._executor(), call)
+        finally:
+            self._running[tool] -= 1
+            sem.release()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        tools = self._running.keys() | self._waiting.keys()
+        return {
+            tool: {
+                "running": self._running.get(tool, 0),
+                "waiting": self._waiting.get(tool, 0),
+                "limit": self.limits.get(tool, self.default_limit),
+            }
+            for tool in sorted(tools)
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,237 @@
+"""
+异步 CRUD（sqlalchemy.ext.asyncio）
+
+crud.py 的 create_entity / update_entity / get_entity_by_field / list_entities
+在 AsyncSession 上的版本，参数和返回值与同步版相同，调用时 await。
+同步版在 FastAPI 里每次调用占一个线程池 worker 等数据库；异步版等待时让出事件循环，
+一个 worker 可以同时处理很多请求。
+
+依赖 sqlalchemy[asyncio]（greenlet）和异步驱动：PostgreSQL 用 asyncpg，
+本地测试用 aiosqlite（sqlite+aiosqlite:///./test.db）。
+
+- session 为 sqlmodel 的 AsyncSession（sqlalchemy AsyncSession 的子类，多一个 exec）
+- 计数缓存、写入钩子、列投影与 crud.py 共用：异步写操作同样使计数缓存失效
+- list_entities 的计数查询和分页查询尽量并发执行，见 list_entities 说明
+"""
+
+import asyncio
+from typing import Any, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import SingletonThreadPool, StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .crud import (
+    COUNT_STRATEGIES,
+    ESTIMATE_EXACT_BELOW,
+    Projection,
+    _cached_count,
+    _convert,
+    _count_key,
+    _count_query,
+    _estimated_count,
+    _filter_condition,
+    _notify_write,
+    _page_query,
+    _select,
+    _store_count,
+)
+
+T = TypeVar("T", bound=SQLModel)
+
+
+async def create_entity(
+    *,
+    session: AsyncSession,
+    entity_create: SQLModel,
+    model_class: type[T],
+    extra_data: dict[str, Any] | None = None,
+) -> T:
+    """
+    创建实体。
+
+    示例:
+        item = await create_entity(
+            session=session,
+            entity_create=item_in,
+            model_class=Item,
+            extra_data={"owner_id": current_user.id},
+        )
+    """
+    db_obj = model_class.model_validate(
+        entity_create, update=extra_data or {}
+    )
+    session.add(db_obj)
+    await session.commit()
+    _notify_write(model_class)
+    await session.refresh(db_obj)
+    return db_obj
+
+
+async def update_entity(
+    *,
+    session: AsyncSession,
+    db_entity: T,
+    entity_update: SQLModel,
+    extra_data: dict[str, Any] | None = None,
+) -> T:
+    """
+    更新实体（仅更新传入的字段，exclude_unset=True）。
+
+    示例:
+        user = await update_entity(
+            session=session,
+            db_entity=db_user,
+            entity_update=user_in,
+        )
+    """
+    update_data = entity_update.model_dump(exclude_unset=True)
+    if extra_data:
+        update_data.update(extra_data)
+    db_entity.sqlmodel_update(update_data)
+    session.add(db_entity)
+    await session.commit()
+    _notify_write(type(db_entity))
+    await session.refresh(db_entity)
+    return db_entity
+
+
+async def get_entity_by_field(
+    *,
+    session: AsyncSession,
+    model_class: type[T],
+    field_name: str,
+    value: Any,
+    projection: Projection = None,
+) -> T | Any | None:
+    """
+    按字段查询单个实体，projection 同 crud.get_entity_by_field。
+
+    示例:
+        user = await get_entity_by_field(
+            session=session,
+            model_class=User,
+            field_name="email",
+            value="user@example.com",
+        )
+    """
+    statement = _select(model_class, projection).where(
+        getattr(model_class, field_name) == value
+    )
+    row = (await session.exec(statement)).first()
+    if row is None or projection is None:
+        return row
+    return _convert([row], projection)[0]
+
+
+async def count_entities(
+    *,
+    session: AsyncSession,
+    model_class: type[SQLModel],
+    filter_field: str | None = None,
+    filter_value: Any = None,
+    strategy: str = "exact",
+) -> int:
+    """按 strategy（exact / estimated / cached）统计实体数，同 crud.count_entities"""
+    if strategy not in ("exact", "estimated", "cached"):
+        raise ValueError(f"未知计数方式: {strategy}")
+    condition = _filter_condition(model_class, filter_field, filter_value)
+
+    if strategy == "estimated":
+        estimate = await session.run_sync(_estimated_count, model_class, condition)
+        if estimate is not None and estimate >= ESTIMATE_EXACT_BELOW:
+            return estimate
+
+    key = _count_key(model_class, filter_field, filter_value, condition)
+    if strategy == "cached" and (cached := _cached_count(key)) is not None:
+        return cached
+
+    count = (await session.exec(_count_query(model_class, condition))).one()
+    if strategy == "cached":
+        _store_count(key, count)
+    return count
+
+
+def _separate_engine(session: AsyncSession) -> AsyncEngine | None:
+    """
+    能另开连接做计数时返回 session 绑定的引擎。
+
+    一个 AsyncSession（一条连接）上不能并发执行查询。session 已在事务中时，
+    另一条连接看不到其中未提交的写入，计数可能与分页不一致；
+    StaticPool / SingletonThreadPool（如 SQLite 内存库）所有 session 共用一条连接。
+    这些情况下退回顺序执行。
+    """
+    bind = session.bind
+    if not isinstance(bind, AsyncEngine) or session.in_transaction():
+        return None
+    if isinstance(bind.sync_engine.pool, (StaticPool, SingletonThreadPool)):
+        return None
+    return bind
+
+
+async def list_entities(
+    *,
+    session: AsyncSession,
+    model_class: type[T],
+    skip: int = 0,
+    limit: int = 100,
+    order_by_field: str = "created_at",
+    order_desc: bool = True,
+    filter_field: str | None = None,
+    filter_value: Any = None,
+    count_strategy: str = "exact",
+    projection: Projection = None,
+) -> tuple[list[Any], int]:
+    """
+    分页列表查询，参数和返回值同 crud.list_entities。
+
+    session 还没开始事务（每个请求一个新 session 时的常见情况）且连接池可以给出
+    第二条连接时，计数查询在另一个 session 上与分页查询并发执行，
+    耗时取两者中较长的一个而不是相加；否则在同一个 session 上顺序执行。
+
+    示例:
+        items, count = await list_entities(
+            session=session,
+            model_class=Item,
+            limit=10,
+            filter_field="owner_id",
+            filter_value=current_user.id,
+            projection=ItemPublic,
+        )
+        return ItemsPublic(data=items, count=count)
+    """
+    if count_strategy not in COUNT_STRATEGIES:
+        raise ValueError(f"未知计数方式: {count_strategy}")
+
+    base_query = _page_query(
+        model_class, order_by_field, order_desc, filter_field, filter_value, projection
+    )
+
+    if count_strategy == "none":
+        entities = (await session.exec(base_query.offset(skip).limit(limit + 1))).all()
+        has_more = len(entities) > limit
+        entities = _convert(entities[:limit], projection)
+        return entities, skip + len(entities) + int(has_more)
+
+    count_kwargs = dict(
+        model_class=model_class,
+        filter_field=filter_field,
+        filter_value=filter_value,
+        strategy=count_strategy,
+    )
+
+    async def fetch_page() -> list[Any]:
+        return (await session.exec(base_query.offset(skip).limit(limit))).all()
+
+    engine = _separate_engine(session)
+    if engine is None:
+        count = await count_entities(session=session, **count_kwargs)
+        return _convert(await fetch_page(), projection), count
+
+    async def count_separately() -> int:
+        async with AsyncSession(engine) as count_session:
+            return await count_entities(session=count_session, **count_kwargs)
+
+    count, entities = await asyncio.gather(count_separately(), fetch_page())
+    return _convert(entities, projection), count
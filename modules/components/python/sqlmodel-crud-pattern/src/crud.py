@@ -6,15 +6,46 @@ SQLModel CRUD Pattern - CRUD Functions
 核心模式：
 - model_validate + update: 创建时合并额外字段
 - model_dump(exclude_unset=True) + sqlmodel_update: 部分更新
-- select + func.count + offset/limit: 分页查询
+- select + func.count + offset/limit: 分页查询（count 可选精确 / 估算 / 缓存 / 不计数）
+- (排序字段, id) 元组比较 + 不透明游标: keyset 分页
+- projection: 只查需要的列，返回 Row 或直接校验成 Public 模型
+- 按块 executemany + RETURNING: 批量创建 / upsert / 更新 / 删除
+- async_crud.py: 同样的读写函数在 AsyncSession 上的异步版本
 """
+import base64
+import binascii
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
 from typing import Any, TypeVar
 from uuid import UUID
 
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import delete, insert, inspect, text, tuple_, update
+from sqlalchemy import select as sa_select
 from sqlmodel import Session, col, func, select, SQLModel
 
 T = TypeVar("T", bound=SQLModel)
 
+# 批量操作每块的行数，每块一个事务
+DEFAULT_CHUNK_SIZE = 1000
+
+# 写入钩子：本模块的写操作提交后以 model_class 调用，用于让派生缓存（如计数缓存）失效
+WriteHook = Callable[[type[SQLModel]], None]
+_write_hooks: list[WriteHook] = []
+
+
+def add_write_hook(hook: WriteHook) -> None:
+    """注册写入钩子，例如让自己的列表缓存随 create_entity / update_entity 失效"""
+    _write_hooks.append(hook)
+
+
+def _notify_write(model_class: type[SQLModel]) -> None:
+    for hook in _write_hooks:
+        hook(model_class)
+
 
 def create_entity(
     *,
@@ -45,6 +76,7 @@ def create_entity(
     )
     session.add(db_obj)
     session.commit()
+    _notify_write(model_class)
     session.refresh(db_obj)
     return db_obj
 
@@ -75,20 +107,58 @@ def update_entity(
     db_entity.sqlmodel_update(update_data)
     session.add(db_entity)
     session.commit()
+    _notify_write(type(db_entity))
     session.refresh(db_entity)
     return db_entity
 
 
+# === 列投影 ===
+#
+# 读取函数的 projection 参数：
+# - None: select(model_class)，返回完整 ORM 对象
+# - Public 模型类（如 EntityPublic）: 只查它与表共有的列，结果直接校验成该模型，
+#   API 层不必再 model_validate 一遍
+# - 列名列表: 只查这些列，返回轻量的 Row（按属性或 row._mapping 访问）
+# 投影结果不进 Session 的 identity map，也就不能 session.add 回去更新。
+Projection = type[SQLModel] | Sequence[str] | None
+
+
+def _select(
+    model_class: type[SQLModel], projection: Projection, required: Sequence[str] = ()
+) -> Any:
+    if projection is None:
+        return select(model_class)
+    if isinstance(projection, type):
+        table_columns = model_class.__table__.columns
+        names = [name for name in projection.model_fields if name in table_columns]
+    else:
+        names = list(projection)
+    names += [name for name in required if name not in names]
+    # SQLAlchemy 的 select：单列时也返回 Row，不像 sqlmodel.select 那样退化成标量
+    return sa_select(*(col(getattr(model_class, name)) for name in names))
+
+
+def _convert(rows: Sequence[Any], projection: Projection) -> list[Any]:
+    if isinstance(projection, type) and rows:
+        # 直接 zip 列名比逐行 row._mapping 快约三成
+        names = rows[0]._fields
+        return [projection.model_validate(dict(zip(names, row))) for row in rows]
+    return list(rows)
+
+
 def get_entity_by_field(
     *,
     session: Session,
     model_class: type[T],
     field_name: str,
     value: Any,
-) -> T | None:
+    projection: Projection = None,
+) -> T | Any | None:
     """
     按字段查询单个实体。
 
+    projection 为 Public 模型或列名列表时只查对应的列（见 Projection）。
+
     示例:
         user = get_entity_by_field(
             session=session,
@@ -96,11 +166,179 @@ def get_entity_by_field(
             field_name="email",
             value="user@example.com",
         )
+        user_public = get_entity_by_field(
+            session=session,
+            model_class=User,
+            field_name="email",
+            value="user@example.com",
+            projection=UserPublic,
+        )
     """
-    statement = select(model_class).where(
+    statement = _select(model_class, projection).where(
         getattr(model_class, field_name) == value
     )
-    return session.exec(statement).first()
+    row = session.exec(statement).first()
+    if row is None or projection is None:
+        return row
+    return _convert([row], projection)[0]
+
+
+# === 计数 ===
+#
+# 大表上 select count(*) 要扫全表（PostgreSQL 的 MVCC 没有现成的行数），常常比取一页还慢。
+# - exact: 精确计数
+# - estimated: PostgreSQL 用统计信息估算（无过滤用 pg_class.reltuples，有过滤用 EXPLAIN 的
+#   行数估计），估算值小于 ESTIMATE_EXACT_BELOW 时改为精确计数；其他数据库退回精确计数
+# - cached: 精确计数缓存 COUNT_CACHE_TTL 秒，本模块的写操作通过写入钩子使其失效
+#   （缓存在进程内，多进程部署时其他进程的写入最多延迟 TTL 秒可见）
+# - none: 不计数，list_entities 多取一行判断是否还有下一页
+
+COUNT_STRATEGIES = ("exact", "estimated", "cached", "none")
+ESTIMATE_EXACT_BELOW = 10_000
+COUNT_CACHE_TTL = 60.0
+COUNT_CACHE_MAXSIZE = 1024
+
+# (model_class, filter_field, filter_value) -> (count, 过期时间)
+_count_cache: dict[tuple[Any, ...], tuple[int, float]] = {}
+_count_cache_lock = threading.Lock()
+
+
+def invalidate_count_cache(model_class: type[SQLModel] | None = None) -> None:
+    """清除某个模型（None 为全部）的缓存计数"""
+    with _count_cache_lock:
+        if model_class is None:
+            _count_cache.clear()
+            return
+        for key in [key for key in _count_cache if key[0] is model_class]:
+            del _count_cache[key]
+
+
+add_write_hook(invalidate_count_cache)
+
+
+def _filter_condition(model_class: type[SQLModel], filter_field: str | None, filter_value: Any) -> Any:
+    if filter_field and filter_value is not None:
+        return getattr(model_class, filter_field) == filter_value
+    return None
+
+
+def _estimated_count(session: Session, model_class: type[SQLModel], condition: Any) -> int | None:
+    connection = session.connection(bind_arguments={"mapper": model_class})
+    if connection.dialect.name != "postgresql":
+        return None
+    if condition is None:
+        # reltuples 为 -1 表示表还没有 VACUUM / ANALYZE 过，改用 EXPLAIN
+        estimate = connection.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": model_class.__table__.fullname},
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+
+    query = select(model_class)
+    if condition is not None:
+        query = query.where(condition)
+    compiled = query.compile(dialect=connection.dialect)
+    params: Any = compiled.params
+    if connection.dialect.positional:
+        # asyncpg（$1）、pg8000（%s）等位置参数驱动要按占位符顺序传序列
+        params = tuple(params[name] for name in compiled.positiontup)
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_key(
+    model_class: type[SQLModel], filter_field: str | None, filter_value: Any, condition: Any
+) -> tuple[Any, ...]:
+    return (model_class, filter_field, filter_value if condition is not None else None)
+
+
+def _count_query(model_class: type[SQLModel], condition: Any) -> Any:
+    count_query = select(func.count()).select_from(model_class)
+    if condition is not None:
+        count_query = count_query.where(condition)
+    return count_query
+
+
+def _cached_count(key: tuple[Any, ...]) -> int | None:
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+    return None
+
+
+def _store_count(key: tuple[Any, ...], count: int) -> None:
+    now = time.monotonic()
+    with _count_cache_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAXSIZE:
+            for stale in [k for k, (_, expires) in _count_cache.items() if expires <= now]:
+                del _count_cache[stale]
+            while len(_count_cache) >= COUNT_CACHE_MAXSIZE:
+                del _count_cache[next(iter(_count_cache))]
+        _count_cache[key] = (count, now + COUNT_CACHE_TTL)
+
+
+def count_entities(
+    *,
+    session: Session,
+    model_class: type[SQLModel],
+    filter_field: str | None = None,
+    filter_value: Any = None,
+    strategy: str = "exact",
+) -> int:
+    """
+    按 strategy（exact / estimated / cached）统计实体数，过滤条件同 list_entities。
+
+    示例:
+        total = count_entities(session=session, model_class=Item, strategy="estimated")
+    """
+    if strategy not in ("exact", "estimated", "cached"):
+        raise ValueError(f"未知计数方式: {strategy}")
+    condition = _filter_condition(model_class, filter_field, filter_value)
+
+    if strategy == "estimated":
+        estimate = _estimated_count(session, model_class, condition)
+        if estimate is not None and estimate >= ESTIMATE_EXACT_BELOW:
+            return estimate
+
+    key = _count_key(model_class, filter_field, filter_value, condition)
+    if strategy == "cached" and (cached := _cached_count(key)) is not None:
+        return cached
+
+    count = session.exec(_count_query(model_class, condition)).one()
+    if strategy == "cached":
+        _store_count(key, count)
+    return count
+
+
+def _page_query(
+    model_class: type[SQLModel],
+    order_by_field: str,
+    order_desc: bool,
+    filter_field: str | None,
+    filter_value: Any,
+    projection: Projection,
+) -> Any:
+    """list_entities 的查询（未加 offset / limit）"""
+    base_query = _select(model_class, projection)
+    condition = _filter_condition(model_class, filter_field, filter_value)
+    if condition is not None:
+        base_query = base_query.where(condition)
+
+    if order_desc:
+        base_query = base_query.order_by(
+            col(getattr(model_class, order_by_field)).desc()
+        )
+    else:
+        base_query = base_query.order_by(
+            col(getattr(model_class, order_by_field)).asc()
+        )
+    return base_query
 
 
 def list_entities(
@@ -113,11 +351,17 @@ def list_entities(
     order_desc: bool = True,
     filter_field: str | None = None,
     filter_value: Any = None,
-) -> tuple[list[T], int]:
+    count_strategy: str = "exact",
+    projection: Projection = None,
+) -> tuple[list[Any], int]:
     """
     分页列表查询。
 
-    返回 (entities, total_count)。
+    返回 (entities, total_count)。projection 为 Public 模型或列名列表时只查对应的列，
+    entities 为 Public 模型实例或 Row（见 Projection）。count_strategy 见上方说明：
+    estimated / cached 的 total_count 是近似值；none 不执行计数查询，
+    total_count 为下界 skip + len(entities)，还有下一页时再加 1
+    （total_count > skip + len(entities) 即表示有下一页）。
 
     示例:
         items, count = list_entities(
@@ -127,26 +371,402 @@ def list_entities(
             limit=10,
             filter_field="owner_id",
             filter_value=current_user.id,
+            count_strategy="cached",
+            projection=ItemPublic,
         )
+        return ItemsPublic(data=items, count=count)
     """
-    base_query = select(model_class)
-    count_query = select(func.count()).select_from(model_class)
+    if count_strategy not in COUNT_STRATEGIES:
+        raise ValueError(f"未知计数方式: {count_strategy}")
 
-    if filter_field and filter_value is not None:
-        condition = getattr(model_class, filter_field) == filter_value
-        base_query = base_query.where(condition)
-        count_query = count_query.where(condition)
+    base_query = _page_query(
+        model_class, order_by_field, order_desc, filter_field, filter_value, projection
+    )
+
+    if count_strategy == "none":
+        entities = session.exec(base_query.offset(skip).limit(limit + 1)).all()
+        has_more = len(entities) > limit
+        entities = _convert(entities[:limit], projection)
+        return entities, skip + len(entities) + int(has_more)
+
+    count = count_entities(
+        session=session,
+        model_class=model_class,
+        filter_field=filter_field,
+        filter_value=filter_value,
+        strategy=count_strategy,
+    )
+    entities = session.exec(base_query.offset(skip).limit(limit)).all()
+    return _convert(entities, projection), count
+
+
+# === Keyset 分页 ===
+#
+# offset 分页翻到第 N 页时数据库要先扫过前面 skip 行。keyset 分页记住上一页最后一行的
+# (排序字段, id)，下一页用 WHERE (排序字段, id) < (上次的值) 直接从索引定位，
+# 每页开销与页码无关。需要 (排序字段, id) 复合索引，见 models.Entity。
+
+
+def _field_adapter(model_class: type[SQLModel], field_name: str) -> TypeAdapter:
+    return TypeAdapter(model_class.model_fields[field_name].annotation)
+
+
+def encode_cursor(
+    model_class: type[SQLModel], entity: SQLModel, order_by_field: str, order_desc: bool
+) -> str:
+    """把一行的 (排序字段, id) 编码成不透明游标（URL 安全 base64）"""
+    key = [
+        _field_adapter(model_class, name).dump_python(getattr(entity, name), mode="json")
+        for name in (order_by_field, "id")
+    ]
+    payload = json.dumps([order_by_field, order_desc, *key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    model_class: type[SQLModel], cursor: str, order_by_field: str, order_desc: bool
+) -> tuple[Any, Any]:
+    """游标 -> (排序字段值, id)；格式错误或与当前排序不一致时抛 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        field, desc, value, entity_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("无效的分页游标") from None
+    if field != order_by_field or desc != order_desc:
+        raise ValueError("分页游标与当前排序方式不一致")
+    try:
+        return (
+            _field_adapter(model_class, order_by_field).validate_python(value),
+            _field_adapter(model_class, "id").validate_python(entity_id),
+        )
+    except ValidationError:
+        raise ValueError("无效的分页游标") from None
+
+
+def list_entities_keyset(
+    *,
+    session: Session,
+    model_class: type[T],
+    cursor: str | None = None,
+    limit: int = 100,
+    order_by_field: str = "created_at",
+    order_desc: bool = True,
+    filter_field: str | None = None,
+    filter_value: Any = None,
+    projection: Projection = None,
+) -> tuple[list[Any], str | None]:
+    """
+    游标分页列表查询，返回 (entities, next_cursor)；没有下一页时 next_cursor 为 None。
+
+    按 (order_by_field, id) 排序，id 保证排序字段相同时顺序稳定。
+    排序字段不能为 NULL（NULL 的行不会出现在翻页结果里）。
+    cursor 无效或与 order_by_field / order_desc 不匹配时抛 ValueError。
+    projection 同 list_entities；列名列表会自动补上生成游标所需的排序字段和 id。
+
+    示例:
+        items, next_cursor = list_entities_keyset(
+            session=session,
+            model_class=Item,
+            cursor=cursor,
+            limit=10,
+            filter_field="owner_id",
+            filter_value=current_user.id,
+        )
+        return ItemsPage(data=items, next_cursor=next_cursor)
+    """
+    order_col = col(getattr(model_class, order_by_field))
+    id_col = col(getattr(model_class, "id"))
+    query = _select(model_class, projection, required=(order_by_field, "id"))
+
+    condition = _filter_condition(model_class, filter_field, filter_value)
+    if condition is not None:
+        query = query.where(condition)
 
-    count = session.exec(count_query).one()
+    if cursor is not None:
+        # 右侧用普通 tuple，参数按左侧列的类型绑定（PostgreSQL 上是 timestamptz 而不是 timestamp）
+        last = decode_cursor(model_class, cursor, order_by_field, order_desc)
+        key = tuple_(order_col, id_col)
+        query = query.where(key < last if order_desc else key > last)
 
     if order_desc:
-        base_query = base_query.order_by(
-            col(getattr(model_class, order_by_field)).desc()
+        query = query.order_by(order_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(order_col.asc(), id_col.asc())
+
+    # 多取一行判断是否还有下一页，不需要 count
+    rows = session.exec(query.limit(limit + 1)).all()
+    if len(rows) <= limit:
+        return _convert(rows, projection), None
+    rows = rows[:limit]
+    next_cursor = encode_cursor(model_class, rows[-1], order_by_field, order_desc)
+    return _convert(rows, projection), next_cursor
+
+
+# === 批量操作 ===
+#
+# 逐条 create_entity / update_entity 每行一次 commit + 一次 refresh 查询。
+# 批量版本按 chunk_size 分块，每块一条 executemany（SQLAlchemy 会合并成
+# 多行 INSERT ... VALUES）和一次 commit，数据库生成的值通过 RETURNING 带回。
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    if size < 1:
+        raise ValueError("chunk_size 必须大于 0")
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@contextmanager
+def _keep_loaded(session: Session) -> Iterator[None]:
+    """
+    提交时不过期 session 中的对象。
+
+    返回的对象已由 RETURNING / 本事务内的查询填充为数据库中的值，
+    默认的 expire_on_commit 会让之后每次访问属性都再查一次。
+    """
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        yield
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+
+def _primary_key(model_class: type[SQLModel]) -> Any:
+    columns = inspect(model_class).primary_key
+    if len(columns) != 1:
+        raise ValueError(f"{model_class.__name__} 不是单列主键，不支持按主键批量操作")
+    return getattr(model_class, columns[0].key)
+
+
+def _validated_rows(
+    entities: Sequence[SQLModel],
+    model_class: type[T],
+    extra_data: dict[str, Any] | None,
+) -> list[dict[str, Any]]:
+    # 与 create_entity 一样经过 model_validate：校验字段、生成 id / created_at 默认值
+    return [
+        model_class.model_validate(entity, update=extra_data or {}).model_dump()
+        for entity in entities
+    ]
+
+
+def bulk_create_entities(
+    *,
+    session: Session,
+    entities_create: Sequence[SQLModel],
+    model_class: type[T],
+    extra_data: dict[str, Any] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[T]:
+    """
+    批量创建实体，返回顺序与输入一致。
+
+    每块一条 INSERT ... RETURNING 和一次 commit，不再逐行 refresh。
+    某块失败时该块回滚，之前的块已提交。
+
+    示例:
+        items = bulk_create_entities(
+            session=session,
+            entities_create=items_in,
+            model_class=Item,
+            extra_data={"owner_id": current_user.id},
         )
+    """
+    statement = insert(model_class).returning(model_class, sort_by_parameter_order=True)
+    created: list[T] = []
+    with _keep_loaded(session):
+        for chunk in _chunks(entities_create, chunk_size):
+            rows = _validated_rows(chunk, model_class, extra_data)
+            try:
+                created.extend(session.exec(statement, params=rows).scalars().all())
+                session.commit()
+                _notify_write(model_class)
+            except Exception:
+                session.rollback()
+                raise
+    return created
+
+
+def _dialect_insert(session: Session, model_class: type[SQLModel]) -> Any:
+    dialect = session.get_bind(mapper=model_class).dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
     else:
-        base_query = base_query.order_by(
-            col(getattr(model_class, order_by_field)).asc()
+        raise ValueError(f"bulk_upsert_entities 只支持 PostgreSQL 和 SQLite，当前为 {dialect}")
+    return dialect_insert(model_class)
+
+
+def _upsert_statement(
+    session: Session,
+    model_class: type[SQLModel],
+    conflict_fields: Sequence[str],
+    update_fields: Sequence[str],
+) -> Any:
+    statement = _dialect_insert(session, model_class)
+    # 没有可更新的列时仍要返回已有行，用冲突列自我赋值代替 DO NOTHING
+    set_fields = update_fields or conflict_fields
+    statement = statement.on_conflict_do_update(
+        index_elements=list(conflict_fields),
+        set_={name: statement.excluded[name] for name in set_fields},
+    )
+    statement = statement.returning(model_class, sort_by_parameter_order=True)
+    return statement.execution_options(populate_existing=True)
+
+
+def _group_by_explicit_fields(
+    entities: Sequence[SQLModel],
+    conflict_fields: Sequence[str],
+    extra_data: dict[str, Any] | None,
+) -> list[tuple[list[str], list[SQLModel]]]:
+    """
+    按显式设置过的字段（加上 extra_data 的键）把相邻的输入分组：[(更新列, 实体), ...]。
+    每组一条语句，一行没设置的字段不会被同批其他行带进 SET 而被默认值覆盖。
+    """
+    groups: list[tuple[list[str], list[SQLModel]]] = []
+    for entity in entities:
+        explicit = dict.fromkeys(entity.model_dump(exclude_unset=True))
+        explicit.update(dict.fromkeys(extra_data or {}))
+        fields = [name for name in explicit if name not in conflict_fields]
+        if groups and set(groups[-1][0]) == set(fields):
+            groups[-1][1].append(entity)
+        else:
+            groups.append((fields, [entity]))
+    return groups
+
+
+def bulk_upsert_entities(
+    *,
+    session: Session,
+    entities: Sequence[SQLModel],
+    model_class: type[T],
+    conflict_fields: Sequence[str] = ("id",),
+    update_fields: Sequence[str] | None = None,
+    extra_data: dict[str, Any] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[T]:
+    """
+    批量插入或更新（INSERT ... ON CONFLICT DO UPDATE ... RETURNING）。
+
+    Args:
+        conflict_fields: 冲突判定列，需有主键或唯一约束（如 ("email",)）
+        update_fields: 冲突时更新的列；默认每行只更新自己显式设置过的字段
+            （加上 extra_data 的键），不覆盖已有行的 id、created_at 等默认值。
+            各行设置的字段不同时，相邻且字段相同的行合成一条语句，按输入顺序执行
+
+    同一块内冲突键重复的输入只保留最后一条（PostgreSQL 不允许一条语句更新同一行两次）。
+    返回插入或更新后的实体；session 中已有的同一实体会被刷新为新值。
+
+    示例:
+        users = bulk_upsert_entities(
+            session=session,
+            entities=users_in,
+            model_class=User,
+            conflict_fields=("email",),
+        )
+    """
+    if update_fields is None:
+        groups = _group_by_explicit_fields(entities, conflict_fields, extra_data)
+    else:
+        groups = [(list(update_fields), list(entities))]
+
+    upserted: list[T] = []
+    with _keep_loaded(session):
+        for fields, group in groups:
+            statement = _upsert_statement(session, model_class, conflict_fields, fields)
+            for chunk in _chunks(group, chunk_size):
+                rows = {
+                    tuple(row[name] for name in conflict_fields): row
+                    for row in _validated_rows(chunk, model_class, extra_data)
+                }
+                try:
+                    upserted.extend(
+                        session.exec(statement, params=list(rows.values())).scalars().all()
+                    )
+                    session.commit()
+                    _notify_write(model_class)
+                except Exception:
+                    session.rollback()
+                    raise
+    return upserted
+
+
+def bulk_update_entities(
+    *,
+    session: Session,
+    model_class: type[T],
+    updates: Mapping[Any, SQLModel],
+    extra_data: dict[str, Any] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[T]:
+    """
+    按主键批量部分更新，updates 为 {主键: 更新模型}（exclude_unset，同 update_entity）。
+
+    每块一条按主键的 executemany UPDATE（字段组合相同的行合并执行），
+    UPDATE 的 executemany 不支持 RETURNING，改为每块一次 IN 查询取回更新后的行。
+    主键不存在时抛 sqlalchemy.orm.exc.StaleDataError，该块回滚，之前的块已提交。
+
+    示例:
+        items = bulk_update_entities(
+            session=session,
+            model_class=Item,
+            updates={item_id: ItemUpdate(title="新标题") for item_id in ids},
         )
+    """
+    pk = _primary_key(model_class)
+    rows = []
+    for key, entity_update in updates.items():
+        update_data = entity_update.model_dump(exclude_unset=True)
+        if extra_data:
+            update_data.update(extra_data)
+        if update_data:
+            update_data.pop(pk.key, None)
+            rows.append({pk.key: key, **update_data})
 
-    entities = session.exec(base_query.offset(skip).limit(limit)).all()
-    return list(entities), count
+    updated: list[T] = []
+    with _keep_loaded(session):
+        for chunk in _chunks(rows, chunk_size):
+            keys = [row[pk.key] for row in chunk]
+            try:
+                session.exec(update(model_class), params=list(chunk))
+                statement = (
+                    select(model_class)
+                    .where(col(pk).in_(keys))
+                    .execution_options(populate_existing=True)
+                )
+                updated.extend(session.exec(statement).all())
+                session.commit()
+                _notify_write(model_class)
+            except Exception:
+                session.rollback()
+                raise
+    return updated
+
+
+def bulk_delete_entities(
+    *,
+    session: Session,
+    model_class: type[SQLModel],
+    ids: Sequence[Any],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    按主键批量删除，每块一条 DELETE ... WHERE id IN (...)，返回删除行数。
+
+    示例:
+        deleted = bulk_delete_entities(session=session, model_class=Item, ids=item_ids)
+    """
+    pk = _primary_key(model_class)
+    deleted = 0
+    for chunk in _chunks(ids, chunk_size):
+        try:
+            result = session.exec(delete(model_class).where(col(pk).in_(chunk)))
+            deleted += result.rowcount
+            session.commit()
+            _notify_write(model_class)
+        except Exception:
+            session.rollback()
+            raise
+    return deleted
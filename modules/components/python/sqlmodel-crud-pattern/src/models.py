@@ -8,6 +8,7 @@ SQLModel CRUD Pattern - Models
 - Table Model: 数据库表（继承 Base，添加 id、时间戳）
 - Public: API 返回（继承 Base，添加 id）
 - ListPublic: 分页列表返回（data + count）
+- Page: 游标分页返回（data + next_cursor）
 
 使用方式：
     参考此模板定义你自己的模型，保持四层分离模式。
@@ -15,7 +16,7 @@ SQLModel CRUD Pattern - Models
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index
 from sqlmodel import Field, SQLModel
 
 
@@ -44,6 +45,9 @@ class EntityUpdate(EntityBase):
 
 class Entity(EntityBase, table=True):
     """数据库表模型。"""
+    # keyset 分页按 (created_at, id) 排序和比较，复合索引让翻页直接定位
+    __table_args__ = (Index("ix_entity_created_at_id", "created_at", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created_at: datetime | None = Field(
         default_factory=get_datetime_utc,
@@ -63,6 +67,12 @@ class EntitiesPublic(SQLModel):
     count: int
 
 
+class EntitiesPage(SQLModel):
+    """游标分页返回模型。next_cursor 为 None 表示没有下一页。"""
+    data: list[EntityPublic]
+    next_cursor: str | None = None
+
+
 # === 通用响应模型 ===
 
 class Message(SQLModel):